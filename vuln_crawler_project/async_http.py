@@ -0,0 +1,175 @@
+# async_http.py
+"""
+异步 HTTP 核心
+
+- 全进程共用一个后台事件循环（守护线程），同步代码通过 run_sync() 把协程丢进去等结果
+- 所有爬虫共用一个带连接池的 httpx.AsyncClient（keep-alive；装了 h2 时启用 HTTP/2）；
+  未安装 httpx 时退回 utils._session，在线程池里执行（功能一致，只是每个在途请求占一个线程）
+- 每个 host 一个信号量，限制同一站点同时在途的请求数（utils.POOL_PER_HOST），
+  与连接池大小一致，在途请求数不会超过可复用的长连接数
+- 代理、公共请求头、池大小都跟随 utils，set_proxy() / set_pool_size() 后会自动重建客户端；
+  新请求立即改用新客户端，旧客户端等它上面的在途请求全部结束后才关闭
+- run_sync() 跟随 tasks 的当前 CancelToken：token 取消时协程被取消，调用方收到 tasks.Cancelled
+"""
+
+from __future__ import annotations
+import asyncio, concurrent.futures, importlib.util, threading
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import tasks
+import utils
+from utils import _session
+
+try:
+    import httpx
+except ImportError:          # 可选依赖：没有就走 requests
+    httpx = None
+
+T = TypeVar("T")
+
+# 空闲长连接保留时间（秒）
+KEEPALIVE_EXPIRY = 30.0
+HTTP2 = httpx is not None and importlib.util.find_spec("h2") is not None
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+class _ClientRef:
+    """一个 AsyncClient 及其在途请求数；被换下（retired）后等在途数归零再关闭"""
+
+    def __init__(self, client):
+        self.client = client
+        self.inflight = 0
+        self.retired = False
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._close_if_idle()
+
+    def retire(self) -> None:
+        self.retired = True
+        self._close_if_idle()
+
+    def _close_if_idle(self) -> None:
+        if self.retired and self.inflight == 0:
+            asyncio.ensure_future(self.client.aclose())
+
+
+# 以下状态只在事件循环线程里读写
+_client: Optional[_ClientRef] = None
+_host_sems: Dict[str, asyncio.Semaphore] = {}
+
+# ---------------- 事件循环 ----------------
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever,
+                                            name="async-http", daemon=True)
+            _loop_thread.start()
+    return _loop
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    在后台事件循环里执行协程并阻塞等待结果（供同步包装函数使用）
+    不能在事件循环线程内部调用，否则会死锁 —— 那里请直接 await
+    """
+    loop = _get_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_sync() called from the event loop thread; use await instead")
+    token = tasks.current_token()
+    if token is not None and token.cancelled:
+        coro.close()
+        raise tasks.Cancelled()
+    fut = asyncio.run_coroutine_threadsafe(coro, loop)
+    if token is None:
+        return fut.result(timeout)
+    token.add_callback(fut.cancel)
+    try:
+        return fut.result(timeout)
+    except concurrent.futures.CancelledError:
+        raise tasks.Cancelled() from None
+    finally:
+        token.remove_callback(fut.cancel)
+
+# ---------------- 客户端 ----------------
+
+def _build_client():
+    limits = httpx.Limits(
+        max_connections=None,                          # 总数不限，按 host 由信号量控制
+        max_keepalive_connections=utils.POOL_PER_HOST * 8,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    mounts = {}
+    for scheme in ("http", "https"):
+        proxy = _session.proxies.get(scheme)
+        if proxy:
+            mounts[f"{scheme}://"] = httpx.AsyncHTTPTransport(
+                proxy=proxy, limits=limits, http2=HTTP2,
+            )
+    return httpx.AsyncClient(
+        headers=dict(_session.headers),
+        mounts=mounts or None,
+        limits=limits,
+        http2=HTTP2,
+        follow_redirects=True,
+    )
+
+def _get_client() -> _ClientRef:
+    global _client
+    if _client is None:
+        _client = _ClientRef(_build_client())
+    return _client
+
+def _drop_client() -> None:
+    global _client
+    old, _client = _client, None
+    _host_sems.clear()
+    if old is not None:
+        old.retire()
+
+def reset_client() -> None:
+    """
+    代理 / 公共头 / 池大小变更后调用：下次请求按新配置重建客户端；
+    旧客户端不立即关闭，在途请求照常完成后再关（刷新途中改代理不会打断它们）
+    """
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_drop_client)
+
+def _host_sem(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    sem = _host_sems.get(host)
+    if sem is None:
+        sem = _host_sems[host] = asyncio.Semaphore(utils.POOL_PER_HOST)
+    return sem
+
+# ---------------- 请求 ----------------
+
+async def request(method: str, url: str, *,
+                  params: Optional[Dict[str, Any]] = None,
+                  json: Any = None,
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: float = 8):
+    """
+    发送一个请求，返回响应对象（httpx.Response 或 requests.Response，
+    两者的 .status_code / .headers / .json() / .raise_for_status() 用法一致）
+    """
+    async with _host_sem(url):
+        if httpx is None:
+            return await asyncio.to_thread(
+                _session.request, method, url,
+                params=params, json=json, headers=headers, timeout=timeout,
+            )
+        ref = _get_client()
+        ref.inflight += 1
+        try:
+            return await ref.client.request(
+                method, url, params=params, json=json, headers=headers, timeout=timeout,
+            )
+        finally:
+            ref.release()
@@ -0,0 +1,131 @@
+# bench_handshakes.py
+"""
+统计一次“刷新爬取”建立了多少条 TCP 连接（= TCP/TLS 握手次数）
+
+本地起一个 HTTP/1.1 假上游，把各数据源的 API 地址指过去，分别在
+    before —— 旧配置：公共头带 "Connection: close"，每个请求一条新连接
+    after  —— 当前配置：keep-alive + 连接池复用
+两种模式下跑同一次 fetch_range，打印连接数 / 请求数 / 耗时。
+
+用法:
+    python bench_handshakes.py [天数=7] [每源页数=10]
+"""
+
+import json, sys, threading, time
+import datetime as dt
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import utils, async_http
+import changtin, oscs, qianxin, threatbook, cisa
+
+DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+PAGES = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+_today = dt.date.today()
+_stats = {"conns": 0, "reqs": 0}
+_lock = threading.Lock()
+
+def _page_rows(page: int, per_page: int = 100):
+    """每页 per_page 条，整体按日期倒序铺满 DAYS 天，PAGES 页后结束"""
+    rows = []
+    for i in range(per_page):
+        n = (page - 1) * per_page + i
+        day = _today - dt.timedelta(days=n * DAYS // (PAGES * per_page))
+        rows.append((n, day.isoformat()))
+    return rows
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # 允许 keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self) -> int:
+        return int(parse_qs(urlsplit(self.path).query).get("page", ["1"])[0])
+
+    def do_GET(self):
+        with _lock:
+            _stats["reqs"] += 1
+        if self.path.startswith("/rivers"):
+            page = self._page()
+            rows = [{"id": n, "title": f"vuln {n}", "severity": "high", "cve_id": f"CVE-2000-{n}",
+                     "disclosure_date": f"{d} 00:00:00"} for n, d in _page_rows(page)]
+            self._send({"data": {"total_page": PAGES, "list": rows}})
+        elif self.path.startswith("/qianxin"):
+            self._send({"data": {"vuln_add": []}})
+        elif self.path.startswith("/threatbook"):
+            self._send({"data": {"premium": [], "highRisk": []}})
+        elif self.path.startswith("/cisa"):
+            self._send({"vulnerabilities": []})
+        else:
+            self._send({})
+
+    def do_POST(self):
+        with _lock:
+            _stats["reqs"] += 1
+        page = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["page"]
+        rows = [] if page > PAGES else [
+            {"id": n, "title": f"oscs {n}", "level": "高危", "public_time": f"{d}T00:00:00"}
+            for n, d in _page_rows(page)]
+        self._send({"data": {"data": rows}})
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conn = super().get_request()
+        with _lock:
+            _stats["conns"] += 1
+        return conn
+
+def _point_sources_at(base: str) -> None:
+    changtin.API = f"{base}/rivers"
+    oscs.LIST_API = f"{base}/oscs"
+    qianxin.API_ONE_DAY = f"{base}/qianxin"
+    threatbook.API = f"{base}/threatbook"
+    cisa.API = f"{base}/cisa"
+
+def _refresh(label: str) -> None:
+    _stats.update(conns=0, reqs=0)
+    start = (_today - dt.timedelta(days=DAYS - 1)).isoformat()
+    t0 = time.perf_counter()
+    utils.fetch_range(start, _today.isoformat(), [
+        changtin.fetch_changtin_range,
+        oscs.fetch_oscs_range,
+        qianxin.fetch_qianxin_range,
+        threatbook.fetch_threatbook_range,
+        cisa.fetch_cisa_range,
+    ])
+    cost = time.perf_counter() - t0
+    print(f"{label:<7} handshakes={_stats['conns']:<4} requests={_stats['reqs']:<4} "
+          f"time={cost:.2f}s")
+
+def main() -> None:
+    srv = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _point_sources_at(f"http://127.0.0.1:{srv.server_address[1]}")
+
+    print(f"range={DAYS} day(s), pages/source={PAGES}, "
+          f"transport={'httpx' if async_http.httpx else 'requests'}")
+
+    utils._session.headers["Connection"] = "close"
+    async_http.reset_client()
+    _refresh("before")
+
+    utils._session.headers.pop("Connection", None)
+    async_http.reset_client()
+    _refresh("after")
+
+    srv.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench_json.py
+"""
+CISA KEV 解析：json.loads 整体解码 vs jsonstream 逐行解码
+
+两种方式都从同一份 JSON 原文建出 cisa.KevCatalog：
+    before —— json.loads(body)["vulnerabilities"] 先建整棵 dict 树，再逐行转换
+    after  —— cisa._rows(body)，逐行解码、过滤、转换，解完的行随即丢弃
+每种方式在单独的子进程里跑（峰值 RSS 只能按进程统计），打印
+建目录的总耗时、峰值 RSS 增量（进程峰值 - 解析前），以及单独的纯解码耗时
+（不建 VulnItem / 索引，取 5 次最快）。逐行解码省内存，但纯解码比 json.loads 慢。
+
+用法:
+    python bench_json.py [KEV JSON 文件]        # 不给文件则按真实格式生成 N 行
+    python bench_json.py --rows 20000
+"""
+
+import json, subprocess, sys, time
+
+ROWS = 1500
+
+def _fake_kev(n: int) -> bytes:
+    vulns = [{
+        "cveID": f"CVE-2024-{i:05d}",
+        "vendorProject": f"Vendor{i % 300}",
+        "product": f"Product {i % 700}",
+        "vulnerabilityName": f"Vendor{i % 300} Product {i % 700} Remote Code Execution Vulnerability",
+        "dateAdded": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "shortDescription": "Vendor product contains a vulnerability that allows a remote attacker "
+                            "to execute arbitrary code via a crafted request. " * 2,
+        "requiredAction": "Apply mitigations per vendor instructions or discontinue use of the product.",
+        "dueDate": "2024-12-31",
+        "knownRansomwareCampaignUse": "Unknown",
+        "notes": f"https://example.com/advisory/{i} ; https://nvd.nist.gov/vuln/detail/CVE-2024-{i:05d}",
+        "cwes": ["CWE-94"],
+    } for i in range(n)]
+    return json.dumps({"title": "CISA Catalog of Known Exploited Vulnerabilities",
+                       "catalogVersion": "bench", "count": n, "vulnerabilities": vulns}).encode()
+
+def _max_rss_kb() -> float:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss      # macOS 单位是字节
+
+def _child(mode: str, path: str) -> None:
+    import cisa
+    with open(path, "rb") as f:
+        body = f.read()
+    base = _max_rss_kb()
+    t0 = time.perf_counter()
+    if mode == "before":
+        catalog = cisa.KevCatalog("bench", json.loads(body).get("vulnerabilities", []))
+    else:
+        catalog = cisa.KevCatalog("bench", cisa._rows(body))
+    cost = time.perf_counter() - t0
+    peak = (_max_rss_kb() - base) / 1024
+    rows = len(catalog.items)
+    del catalog
+    if mode == "before":
+        decode = lambda: json.loads(body).get("vulnerabilities", [])
+    else:
+        import jsonstream
+        decode = lambda: [None for _ in jsonstream.iter_array(body, "vulnerabilities")]
+    runs = []
+    for _ in range(5):
+        t1 = time.perf_counter()
+        decode()
+        runs.append(time.perf_counter() - t1)
+    print(f"{mode:<7} rows={rows:<6} time={cost * 1000:7.1f} ms  "
+          f"peak RSS +{peak:6.1f} MB  decode only {min(runs) * 1000:6.1f} ms")
+
+def main() -> None:
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        _child(args[1], args[2])
+        return
+    if args[:1] == ["--rows"]:
+        path = None
+        n = int(args[1])
+    else:
+        path = args[0] if args else None
+        n = ROWS
+    if path is None:
+        import tempfile
+        path = tempfile.mkstemp(suffix=".json")[1]
+        with open(path, "wb") as f:
+            f.write(_fake_kev(n))
+    with open(path, "rb") as f:
+        size = len(f.read())
+    print(f"document: {size / 1e6:.1f} MB")
+    for mode in ("before", "after"):
+        subprocess.run([sys.executable, __file__, "--child", mode, path], check=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 # changtin.py  ⬅️ 完全替换下面同名部分即可
-from typing import List
-import datetime as dt, time, random
-from models import VulnItem
-from utils import _session
+from typing import Dict, List, Optional, Tuple
+import resilience
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult, VulnItem
+from utils import Marker, bucket_by_date
+from async_http import run_sync
+from paging import PageBudget, iter_pages
 
 API = "https://rivers.chaitin.cn/api/vuln/list"
 
@@ -15,28 +17,47 @@ SEV_MAP = {
 LEVEL_OK = set(SEV_MAP.keys())
 
 # ---------- 共用内部函数 ----------
-def _get_page(page: int, size: int = 100, keyword: str = ""):
-    """携带 keyword 取分页数据；服务器 5xx 时重试 3 次"""
-    for attempt in range(3):
-        try:
-            params = {"page": page, "size": size}
-            if keyword:                       # 仅搜索时才带
-                params["keyword"] = keyword
-            r = _session.get(API, params=params, timeout=8)
-            r.raise_for_status()              # 4xx/5xx 抛异常 → 触发重试
-            return r.json()["data"]           # Rivers: {"code":0,"data":{...}}
-        except Exception as e:
-            print(f"[Rivers] page {page} attempt {attempt+1}: {e}")
-            time.sleep(random.uniform(1, 2))
-    return None
+async def _get_page(page: int, size: int = 100, keyword: str = ""):
+    """
+    携带 keyword 取分页数据；5xx / 超时的重试与熔断见 resilience
+    失败一律抛异常（熔断中为 BreakerOpen），不返回空页冒充“没有数据”
+    """
+    params = {"page": page, "size": size}
+    if keyword:                               # 仅搜索时才带
+        params["keyword"] = keyword
+    r = await resilience.request(__name__, "GET", API, params=params, timeout=8)
+    r.raise_for_status()
+    return r.json()["data"]                   # Rivers: {"code":0,"data":{...}}
+
+def _to_item(row: dict) -> VulnItem:
+    return VulnItem(
+        name=row["title"],
+        cve=row.get("cve_id"),
+        date=row["disclosure_date"].split(" ")[0],
+        severity=SEV_MAP.get(row["severity"], row["severity"]),
+        tags=row.get("weakness"),
+        source="长亭 Rivers",
+        description=row.get("summary"),
+        reference=row.get("references") or "",
+    )
+
+def _marker(row: dict) -> Marker:
+    return row["disclosure_date"], str(row.get("id") or row["title"])
 
 # ---------- 搜索 ----------
-def search_changtin(keyword: str) -> List[VulnItem]:
-    vulns, page, size = [], 1, 100
+async def asearch_changtin(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    """
+    第 1 页拿到 total_page 后，其余页并发预取，仍按页码顺序处理
+    budget 用完（页数 / 条数 / 时间）提前返回，结果 truncated=True
+    """
+    vulns, size = [], 100
     is_cve = keyword.lower().startswith("cve-")
+    pb = PageBudget(budget or DEFAULT_BUDGET)
 
-    while True:
-        data = _get_page(page, size, keyword)
+    pages = iter_pages(lambda p: _get_page(p, size, keyword),
+                       is_last=lambda d: not d or not d.get("list"),
+                       total=lambda d: d["total_page"], budget=pb)
+    async for _, data in pages:
         if not data or not data.get("list"):
             break
 
@@ -48,52 +69,69 @@ def search_changtin(keyword: str) -> List[VulnItem]:
                or (not is_cve and keyword.lower() not in row["title"].lower()):
                 continue
 
-            vulns.append(
-                VulnItem(
-                    name=row["title"],
-                    cve=row.get("cve_id"),
-                    date=row["disclosure_date"].split(" ")[0],
-                    severity=SEV_MAP.get(sev, sev),
-                    tags=row.get("weakness"),
-                    source="长亭 Rivers",
-                    description=row.get("summary"),
-                    reference=row.get("references") or "",
-                )
-            )
-
-        if page >= data["total_page"]:
+            vulns.append(_to_item(row))
+            if pb.full(len(vulns)):
+                break
+        if pb.truncated:
             break
-        page += 1
-    return vulns
+    return SearchResult(vulns, pb.truncated, pb.error)
 
-# ---------- 日期抓取（原逻辑完全保留） ----------
-def fetch_changtin(date: str) -> List[VulnItem]:
-    vulns, target = [], dt.date.fromisoformat(date)
+# ---------- 日期抓取 ----------
+async def afetch_changtin_since(start: str, end: str, marker: Optional[Marker] = None
+                                ) -> Tuple[Dict[str, List[VulnItem]], Optional[Marker]]:
+    """
+    列表按披露时间倒序：从第 1 页往后翻，直到某页最后一条早于 start，
+    整个日期范围只翻一遍。给了 marker（上次已入库的最新一行）时，
+    碰到 marker 本身或更早的行就停，只返回比它新的条目。
+    返回 ({日期: [VulnItem]}, 新 marker)；新 marker 为第一条不晚于 end 的行
+    只有翻到 marker / start / 最后一页才算翻完：中途某页失败（_get_page 抛异常）
+    或在 total_page 之前出现空页都直接抛异常，不返回半截结果和新 marker ——
+    否则没翻到的那几页会被 marker 永远跳过
+    """
+    vulns: List[VulnItem] = []
+    newest: Optional[Marker] = None
     page, size = 1, 100
     while True:
-        data = _get_page(page, size)
+        data = await _get_page(page, size)
         if not data or not data.get("list"):
+            if page > 1:
+                raise RuntimeError(f"[Rivers] page {page} is empty before total_page, walk incomplete")
             break
+        seen = False
         for row in data["list"]:
-            if row["severity"] not in LEVEL_OK:
-                continue
-            disc = row["disclosure_date"].split(" ")[0]
-            if disc != date:
+            mk = _marker(row)
+            if marker and (mk == marker or mk[0] < marker[0]):
+                seen = True
+                break
+            disc = mk[0].split(" ")[0]
+            if disc > end:
                 continue
-            vulns.append(
-                VulnItem(
-                    name=row["title"],
-                    cve=row.get("cve_id"),
-                    date=disc,
-                    severity=SEV_MAP.get(row["severity"], row["severity"]),
-                    tags=row.get("weakness"),
-                    source="长亭 Rivers",
-                    description=row.get("summary"),
-                    reference=row.get("references") or "",
-                )
-            )
+            newest = newest or mk
+            if row["severity"] in LEVEL_OK and disc >= start:
+                vulns.append(_to_item(row))
         last_date = data["list"][-1]["disclosure_date"].split(" ")[0]
-        if dt.date.fromisoformat(last_date) < target or page >= data["total_page"]:
+        if seen or last_date < start or page >= data["total_page"]:
             break
         page += 1
-    return vulns
+    return bucket_by_date(vulns, start, end), newest or marker
+
+async def afetch_changtin_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    """返回 {日期: [VulnItem]}"""
+    return (await afetch_changtin_since(start, end))[0]
+
+async def afetch_changtin(date: str) -> List[VulnItem]:
+    return (await afetch_changtin_range(date, date))[date]
+
+# ---------- 同步包装 ----------
+def search_changtin(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    return run_sync(asearch_changtin(keyword, budget))
+
+def fetch_changtin_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    return run_sync(afetch_changtin_range(start, end))
+
+def fetch_changtin_since(start: str, end: str, marker: Optional[Marker] = None
+                         ) -> Tuple[Dict[str, List[VulnItem]], Optional[Marker]]:
+    return run_sync(afetch_changtin_since(start, end, marker))
+
+def fetch_changtin(date: str) -> List[VulnItem]:
+    return run_sync(afetch_changtin(date))
@@ -3,12 +3,26 @@
 CISA Known Exploited Vulnerabilities (KEV) Catalog
 
 - 按日期抓取：fetch_cisa(date) —— 保持原有逻辑
-- 关键词 / CVE 搜索：search_cisa(keyword)
+- 日期范围：fetch_cisa_range(start, end) —— 整个 JSON 只下载一次
+- 关键词 / CVE 搜索：search_cisa(keyword, budget)（单个 JSON，预算只看条数和时间）
+- 以上均有 async 版本（afetch_* / asearch_*），同步函数只是 run_sync() 包装
+- JSON 走 http_cache 条件 GET；每个 feed 版本只解析一次，建成 KevCatalog 索引，
+  feed 未变时 304 直接复用
+- 解析用 jsonstream 逐行解码 vulnerabilities[]：每行解出来就转成 VulnItem（无效行直接跳过），
+  不会先建出整棵 dict 树。代价是纯解码比 json.loads 慢（视机器和文档大小，最多约 2 倍），
+  换来峰值内存只有原来的三分之一左右（对比见 bench_json.py）
+- 解码 + 建索引是纯 CPU 活，在线程里做，不占用 async_http 的事件循环
 """
 
-from typing import List, Dict, Any
-from models import VulnItem
-from utils import _session
+import asyncio
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult, VulnItem
+from utils import bucket_by_date, date_range
+from async_http import run_sync
+from paging import PageBudget
+import http_cache
+import jsonstream
 
 API = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
 
@@ -22,74 +36,140 @@ def _get(v: Dict[str, Any], *names):
             return val
     return ""
 
+def _to_item(r: Dict[str, Any]) -> VulnItem:
+    return VulnItem(
+        name=_get(r, "vulnerabilityName", "vulnerability_name"),
+        cve=_get(r, "cveID", "cve_id"),
+        date=_get(r, "dateAdded", "date_added"),
+        severity=None,
+        tags=_get(r, "vendorProject", "vendor_project"),
+        source="CISA KEV",
+        description=_get(r, "shortDescription", "short_description"),
+        reference=r.get("notes"),
+    )
+
+def _rows(doc: bytes) -> Iterator[Dict[str, Any]]:
+    """边解码边过滤：只留有 CVE 或名称的行"""
+    for r in jsonstream.iter_array(doc, "vulnerabilities"):
+        if isinstance(r, dict) and (_get(r, "cveID", "cve_id")
+                                    or _get(r, "vulnerabilityName", "vulnerability_name")):
+            yield r
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# -------------------------- 索引目录 --------------------------
+
+class KevCatalog:
+    """
+    一个 feed 版本对应一个实例，构建时把每行转换成 VulnItem 并建索引：
+      - by_cve   —— 小写 CVE → 条目列表（同一 CVE 可能有多行，按 feed 原顺序）
+      - by_date  —— dateAdded → 条目列表
+      - 名称小写后的 3-gram 倒排表 —— 子串搜索先按 3-gram 求交集，再逐条确认
+    查询返回的 VulnItem 在同一版本内共享，调用方不要原地修改
+    """
+
+    def __init__(self, version: str, rows: Iterable[Dict[str, Any]]):
+        self.version = version
+        self.items: List[VulnItem] = [_to_item(r) for r in rows]
+        self.by_cve: Dict[str, List[VulnItem]] = defaultdict(list)
+        self.by_date: Dict[str, List[VulnItem]] = defaultdict(list)
+        self._names: List[str] = []
+        self._gram_index: Dict[str, List[int]] = defaultdict(list)
+
+        for idx, it in enumerate(self.items):
+            if it.cve:
+                self.by_cve[it.cve.lower()].append(it)
+            self.by_date[it.date].append(it)
+            name = it.name.lower()
+            self._names.append(name)
+            for g in _grams(name):
+                self._gram_index[g].append(idx)
+
+    def lookup_cve(self, cve: str) -> List[VulnItem]:
+        return list(self.by_cve.get(cve.lower(), ()))
+
+    def between(self, start: str, end: str) -> List[VulnItem]:
+        out: List[VulnItem] = []
+        for day in date_range(start, end):
+            out.extend(self.by_date.get(day, ()))
+        return out
+
+    def search_name(self, keyword: str) -> List[VulnItem]:
+        """名称包含 keyword（不区分大小写），按 feed 原顺序返回"""
+        kw = keyword.lower()
+        grams = _grams(kw)
+        if not grams:                     # 不足 3 个字符：直接扫预先小写好的名称
+            candidates = range(len(self._names))
+        else:
+            postings = sorted((self._gram_index.get(g, []) for g in grams), key=len)
+            common = set(postings[0])
+            for p in postings[1:]:
+                common.intersection_update(p)
+                if not common:
+                    break
+            candidates = sorted(common)
+        return [self.items[i] for i in candidates if kw in self._names[i]]
+
+
+_catalog: Optional[KevCatalog] = None
+
+async def _load_catalog() -> KevCatalog:
+    global _catalog
+    entry = await http_cache.get(API, timeout=12)
+    if _catalog is None or _catalog.version != entry.version:
+        # 十几 MB 的 feed 解码 + 建索引要几百毫秒：放到工作线程里做，不阻塞事件循环上其它源的请求
+        _catalog = await asyncio.to_thread(
+            lambda: KevCatalog(entry.version, _rows(entry.body())))
+    return _catalog
+
 # ------------------------ 按日期抓取 -------------------------
 
-def fetch_cisa(date: str) -> List[VulnItem]:
+async def afetch_cisa_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    """
+    返回 start <= dateAdded <= end 的全部条目，按日期分桶（KEV 不区分严重度）
+    """
+    catalog = await _load_catalog()
+    return bucket_by_date(catalog.between(start, end), start, end)
+
+async def afetch_cisa(date: str) -> List[VulnItem]:
     """
     返回 dateAdded == <date> 的全部条目（KEV 不区分严重度）
     date 参数格式: 'YYYY-MM-DD'
     """
-    obj = _session.get(API, timeout=12).json()
-    rows = obj.get("vulnerabilities", [])
-    vulns: List[VulnItem] = []
-
-    for r in rows:
-        if _get(r, "dateAdded", "date_added") != date:
-            continue
-        vulns.append(
-            VulnItem(
-                name=_get(r, "vulnerabilityName", "vulnerability_name"),
-                cve=_get(r, "cveID", "cve_id"),
-                date=date,
-                severity=None,
-                tags=_get(r, "vendorProject", "vendor_project"),
-                source="CISA KEV",
-                description=_get(r, "shortDescription", "short_description"),
-                reference=r.get("notes"),
-            )
-        )
-    return vulns
+    catalog = await _load_catalog()
+    return list(catalog.by_date.get(date, ()))
 
 # ------------------------- 关键词搜索 -------------------------
 
-def search_cisa(keyword: str) -> List[VulnItem]:
+async def asearch_cisa(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
     """
     关键词搜索：
       - 以 'CVE-' 开头 → 精确匹配 cveID
       - 其他 → 漏洞名称模糊包含（不区分大小写）
 
-    返回满足条件的 VulnItem 列表，不做严重度过滤
+    返回满足条件的 VulnItem 列表，不做严重度过滤；超出 budget 条数时截断
     """
-    obj = _session.get(API, timeout=12).json()
-    rows = obj.get("vulnerabilities", [])
-    vulns: List[VulnItem] = []
+    pb = PageBudget(budget or DEFAULT_BUDGET)
+    try:
+        catalog = await pb.wait(_load_catalog())
+    except asyncio.TimeoutError:
+        return SearchResult([], truncated=True)
+    if keyword.lower().startswith("cve-"):
+        hits = catalog.lookup_cve(keyword)
+    else:
+        hits = catalog.search_name(keyword)
+    if pb.max_results is not None and len(hits) > pb.max_results:
+        return SearchResult(hits[:pb.max_results], True)
+    return SearchResult(hits)
+
+# ------------------------- 同步包装 -------------------------
+
+def fetch_cisa_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    return run_sync(afetch_cisa_range(start, end))
 
-    kw_lower = keyword.lower()
-    is_cve = kw_lower.startswith("cve-")
-
-    for r in rows:
-        name = _get(r, "vulnerabilityName", "vulnerability_name")
-        cve  = _get(r, "cveID", "cve_id")
+def fetch_cisa(date: str) -> List[VulnItem]:
+    return run_sync(afetch_cisa(date))
 
-        # 过滤逻辑
-        if is_cve:
-            if cve.lower() != kw_lower:
-                continue
-        else:
-            if kw_lower not in name.lower():
-                continue
-
-        vulns.append(
-            VulnItem(
-                name=name,
-                cve=cve,
-                date=_get(r, "dateAdded", "date_added"),
-                severity=None,
-                tags=_get(r, "vendorProject", "vendor_project"),
-                source="CISA KEV",
-                description=_get(r, "shortDescription", "short_description"),
-                reference=r.get("notes"),
-            )
-        )
-
-    return vulns
+def search_cisa(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    return run_sync(asearch_cisa(keyword, budget))
@@ -0,0 +1,97 @@
+# http_cache.py
+"""
+按 URL 缓存到磁盘的条件 GET
+
+- 响应体存 ~/.vuln_crawler_cache/http/<sha1(url)>.body，ETag / Last-Modified 存同名 .json
+- 再次请求时带 If-None-Match / If-Modified-Since；304 直接复用磁盘内容
+- 返回的 CacheEntry.version 在内容不变时保持不变，调用方可据此复用已解析的对象，
+  304 时连磁盘文件都不用读
+- 同一 URL 的并发请求合并为一次；网络失败但本地有缓存时返回旧内容
+"""
+
+from __future__ import annotations
+import asyncio, hashlib, json
+from pathlib import Path
+from typing import Dict, Optional
+
+from async_http import request
+
+CACHE_DIR = Path.home() / ".vuln_crawler_cache" / "http"
+
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+class CacheEntry:
+    """一次条件 GET 的结果；body() 按需读取，内容只在真正需要时才加载"""
+
+    def __init__(self, url: str, version: str, body: Optional[bytes] = None):
+        self.url = url
+        self.version = version
+        self._body = body
+
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = _paths(self.url)[0].read_bytes()
+        return self._body
+
+
+def _paths(url: str):
+    h = hashlib.sha1(url.encode()).hexdigest()
+    return CACHE_DIR / f"{h}.body", CACHE_DIR / f"{h}.json"
+
+def _load_meta(url: str) -> dict:
+    body_p, meta_p = _paths(url)
+    try:
+        if body_p.exists() and meta_p.exists():
+            return json.loads(meta_p.read_text())
+    except Exception as e:
+        print("[http-cache] meta load error:", e)
+    return {}
+
+def _save(url: str, body: bytes, meta: dict) -> None:
+    body_p, meta_p = _paths(url)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再替换，避免半截文件
+    tmp = body_p.with_suffix(".tmp")
+    tmp.write_bytes(body)
+    tmp.replace(body_p)
+    meta_p.write_text(json.dumps(meta))
+
+def _version(meta: dict) -> str:
+    return meta.get("etag") or meta.get("last_modified") or meta.get("sha1", "")
+
+
+async def get(url: str, timeout: float = 12) -> CacheEntry:
+    """条件 GET：内容未变返回磁盘缓存（version 不变），变了则落盘后返回新内容"""
+    lock = _locks.setdefault(url, asyncio.Lock())
+    async with lock:
+        meta = _load_meta(url)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            r = await request("GET", url, headers=headers or None, timeout=timeout)
+            if r.status_code == 304 and meta:
+                return CacheEntry(url, _version(meta))
+            r.raise_for_status()
+        except Exception as e:
+            if not meta:
+                raise
+            print(f"[http-cache] {url}: {e}, using cached copy")
+            return CacheEntry(url, _version(meta))
+
+        body = r.content
+        meta = {
+            "url": url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "sha1": hashlib.sha1(body).hexdigest(),
+        }
+        try:
+            await asyncio.to_thread(_save, url, body, meta)
+        except Exception as e:
+            print("[http-cache] save error:", e)
+        return CacheEntry(url, _version(meta), body)
@@ -0,0 +1,49 @@
+# jsonstream.py
+"""
+大 JSON 文档的流式解码（只用标准库）
+
+iter_array(doc, key) 逐个产出顶层对象里 key 对应数组的元素：
+数组之外的顶层字段照常解码后丢弃，数组元素用 json 的 C 扫描器
+（JSONDecoder.raw_decode）一个一个解，调用方拿到一行处理完就可以丢掉。
+json.loads 会先把整棵对象树建好再交给调用方，峰值内存 = 全部行的 dict；
+这里峰值只有原文 + 当前一行（外加调用方自己留下的东西）。
+"""
+
+from __future__ import annotations
+import json, re
+from typing import Any, Iterator, Union
+
+_WS = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def _skip(text: str, idx: int) -> int:
+    return _WS.match(text, idx).end()
+
+def _expect(text: str, idx: int, ch: str) -> int:
+    if text[idx:idx + 1] != ch:
+        raise json.JSONDecodeError(f"Expecting {ch!r}", text, idx)
+    return _skip(text, idx + 1)
+
+def iter_array(doc: Union[bytes, str], key: str) -> Iterator[Any]:
+    """doc 须是 JSON 对象；key 不存在或不是数组时什么也不产出"""
+    text = doc.decode("utf-8-sig") if isinstance(doc, bytes) else doc
+    idx = _expect(text, _skip(text, 0), "{")
+    while text[idx:idx + 1] != "}":
+        name, idx = _decoder.raw_decode(text, idx)
+        idx = _expect(text, _skip(text, idx), ":")
+        if name == key and text[idx:idx + 1] == "[":
+            idx = _skip(text, idx + 1)
+            while text[idx:idx + 1] != "]":
+                value, idx = _decoder.raw_decode(text, idx)
+                yield value
+                idx = _skip(text, idx)
+                if text[idx:idx + 1] == ",":
+                    idx = _skip(text, idx + 1)
+                elif text[idx:idx + 1] != "]":
+                    raise json.JSONDecodeError("Expecting ',' or ']'", text, idx)
+            return
+        _, idx = _decoder.raw_decode(text, idx)      # 其它顶层字段：解完即丢
+        idx = _skip(text, idx)
+        if text[idx:idx + 1] == ",":
+            idx = _skip(text, idx + 1)
@@ -1,75 +1,75 @@
+import startup  # 最先导入：计时起点
+
 import sys
 import datetime as dt
 import threading
 import traceback
-
-import requests
-from PyQt6.QtCore import (
-    Qt,
-    QTimer,
-    QMutex,
-    pyqtSignal,
-)
-from PyQt6.QtGui import QColor, QTextCursor
-from PyQt6.QtWidgets import (
-    QApplication,
-    QMainWindow,
-    QWidget,
-    QVBoxLayout,
-    QHBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
-    QLabel,
-    QPushButton,
-    QLineEdit,
-    QDateEdit,
-    QMessageBox,
-    QComboBox,
-    QMenu,
-    QTextBrowser,
-)
-
+from typing import Optional
+
+with startup.timed("PyQt6"):
+    from PyQt6.QtCore import (
+        Qt,
+        QTimer,
+        QMutex,
+        pyqtSignal,
+    )
+    from PyQt6.QtGui import QTextCursor
+    from PyQt6.QtWidgets import (
+        QApplication,
+        QMainWindow,
+        QWidget,
+        QVBoxLayout,
+        QHBoxLayout,
+        QTableView,
+        QLabel,
+        QPushButton,
+        QLineEdit,
+        QDateEdit,
+        QMessageBox,
+        QComboBox,
+        QCheckBox,
+        QMenu,
+        QTextBrowser,
+    )
+    from vuln_table import COLUMNS, POC_COLUMN, VulnTableModel, ItemRole, RowFilter
+
+# 这里只导入轻量模块；数据源、requests / httpx、store、PoC、搜索都在首次用到时
+# 于后台线程里导入（见各方法内的 import），窗口先画出来再说
 from models import VulnItem
-from utils import fetch_all, set_proxy, _session  # noqa: F401 – _session might be unused directly here
-import changtin
-import oscs
-import qianxin
-import threatbook
-import cisa
-from poc_fetcher import fetch_poc_urls, set_github_token
 from config_io import load_cfg, save_cfg
 from html import escape
-from vuln_search import search_vulns
-
-# ---------------------------------------------------------------------------
-# 常量配置
-# ---------------------------------------------------------------------------
-DATE_FETCHERS = [
-    changtin.fetch_changtin,
-    oscs.fetch_oscs,
-    qianxin.fetch_qianxin,
-    threatbook.fetch_threatbook,
-    cisa.fetch_cisa,
-]
-PAGE_SIZE = 30
-
-SEV_COLOR = {
-    "严重": QColor("#c678dd"),  # 紫
-    "极危": QColor("#e06c75"),  # 红
-    "高危": QColor("#e5a742"),  # 橘
-    "高风险": QColor("#61afef"),  # 蓝（ThreatBook）
-    "中危": QColor("#d19a66"),  # 黄
-}
-
+import tasks
+
+_poc_lock = threading.Lock()
+_poc_ready = False
+
+def _poc_fetcher():
+    """首次用到时才导入 poc_fetcher，并应用配置里保存的 GitHub Token"""
+    global _poc_ready
+    with startup.timed("poc_fetcher"):
+        import poc_fetcher
+    with _poc_lock:
+        if not _poc_ready:
+            if token := load_cfg().get("github_token"):
+                poc_fetcher.set_github_token(token)
+            _poc_ready = True
+    return poc_fetcher
+
+def _poc_args(item: VulnItem) -> tuple:
+    """fetch_poc_urls 的参数；点击与预取用同一组，才能命中同一条缓存"""
+    return item.cve, item.name, item.cve or item.tags
 
 # ---------------------------------------------------------------------------
 # 主窗口
 # ---------------------------------------------------------------------------
 class MainWindow(QMainWindow):
-    data_ready = pyqtSignal(list)
+    data_ready = pyqtSignal(object, dict)                # 刷新结果（None = 刷新失败，表格不动）, 各源状态
+    cache_ready = pyqtSignal(list)
     proxy_test_done = pyqtSignal(str)
     add_html = pyqtSignal(str)
-    search_finished = pyqtSignal(list)
+    search_batch = pyqtSignal(object, str, list, bool)   # 搜索 token, 源名, 该源结果, 是否因预算截断
+    search_finished = pyqtSignal(object, object)          # 搜索 token, 跨源合并后的结果（None = 不用替换）
+    poc_ready = pyqtSignal(str, int)                     # CVE, 查到的 PoC 数
 
     # ---------------------------------------------------------------------
     # 初始化
@@ -121,6 +121,10 @@ class MainWindow(QMainWindow):
         self.search_btn.clicked.connect(self.search_vulns_gui)
         bar_top1.addWidget(self.search_btn)
 
+        self.local_chk = QCheckBox("仅本地")
+        self.local_chk.setToolTip("只在本地库的全文索引里检索（名称 / 描述 / 标签 / CVE），不联网，按相关度排序")
+        bar_top1.addWidget(self.local_chk)
+
         bar_top1.addStretch()
         root.addLayout(bar_top1)
 
@@ -167,21 +171,71 @@ class MainWindow(QMainWindow):
         bar_top2.addStretch()
         root.addLayout(bar_top2)
 
+        # 行 3：本地筛选（只筛表格里已有的数据，不联网）
+        bar_filter = QHBoxLayout()
+        bar_filter.addWidget(QLabel("本地筛选:"))
+        self.f_source = QComboBox()
+        self.f_source.addItem("全部来源", "")
+        bar_filter.addWidget(self.f_source)
+        self.f_severity = QComboBox()
+        self.f_severity.addItem("全部等级", "")
+        bar_filter.addWidget(self.f_severity)
+        self.f_date = QLineEdit()
+        self.f_date.setFixedWidth(110)
+        self.f_date.setPlaceholderText("日期前缀 2025-01")
+        bar_filter.addWidget(self.f_date)
+        self.f_cve = QLineEdit()
+        self.f_cve.setFixedWidth(140)
+        self.f_cve.setPlaceholderText("CVE 前缀")
+        bar_filter.addWidget(self.f_cve)
+        self.f_name = QLineEdit()
+        self.f_name.setFixedWidth(240)
+        self.f_name.setPlaceholderText("名称包含")
+        bar_filter.addWidget(self.f_name)
+        self.f_clear = QPushButton("清除筛选")
+        self.f_clear.clicked.connect(self.clear_filter)
+        bar_filter.addWidget(self.f_clear)
+        bar_filter.addStretch()
+        root.addLayout(bar_filter)
+
+        for combo in (self.f_source, self.f_severity):
+            combo.currentIndexChanged.connect(self.apply_filter)
+        for edit in (self.f_date, self.f_cve, self.f_name):
+            edit.textChanged.connect(self.apply_filter)
+
         # --------------------------------------------------------------
         # 中部：表格 + 详情
         # --------------------------------------------------------------
         mid = QHBoxLayout()
 
-        # 表格
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["名称", "日期", "来源", "等级"])
+        # 表格：Model 持有全部结果，视图只绘制可见行；点表头按列排序（默认按名称）
+        # 排序、筛选都由 VulnTableModel 自己成批完成，视图直接挂它，不经 QSortFilterProxyModel
+        self.model = VulnTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setSelectionBehavior(self.table.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(self.table.EditTrigger.NoEditTriggers)
-        self.table.cellClicked.connect(self.show_detail)
+        self.table.verticalHeader().setSectionResizeMode(
+            self.table.verticalHeader().ResizeMode.Fixed)   # 行高固定，不按内容逐行测量
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.table.clicked.connect(self.show_detail)
+        self.model.modelReset.connect(self._refresh_filter_choices)
+        self.model.rowsInserted.connect(self._refresh_filter_choices)
+
+        # 可见行变化（换数据 / 排序 / 筛选 / 滚动）后稍等片刻，再在后台预取这些行的 PoC
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(400)
+        self._prefetch_timer.timeout.connect(self.prefetch_poc)
+        for sig in (self.model.modelReset, self.model.layoutChanged, self.model.rowsInserted,
+                    self.table.verticalScrollBar().valueChanged):
+            sig.connect(self._prefetch_timer.start)
 
         header = self.table.horizontalHeader()
         header.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         header.customContextMenuRequested.connect(self.show_header_menu)
+        header.resizeSection(POC_COLUMN, 50)
 
         mid.addWidget(self.table, 3)
 
@@ -192,52 +246,44 @@ class MainWindow(QMainWindow):
 
         root.addLayout(mid)
 
-        # --------------------------------------------------------------
-        # 分页
-        # --------------------------------------------------------------
-        nav = QHBoxLayout()
-        self.prev_btn = QPushButton("上一页")
-        self.prev_btn.clicked.connect(lambda: self.change_page(-1))
-        self.next_btn = QPushButton("下一页")
-        self.next_btn.clicked.connect(lambda: self.change_page(1))
-        nav.addStretch()
-        nav.addWidget(self.prev_btn)
-        nav.addWidget(self.next_btn)
-        root.addLayout(nav)
-
         # --------------------------------------------------------------
         # 运行时状态
         # --------------------------------------------------------------
-        self.full_data: list[VulnItem] = []
-        self.page = 0
         self._mtx = QMutex()
-        self._click_token = 0
+        self._poc_slot = tasks.TaskSlot()      # 只保留最近一次点击的 PoC 查询
+        self._prefetch_slot = tasks.TaskSlot() # 可见行的 PoC 预取，视图一变就换新的
+        self._prefetch_cves: list[str] = []
+        self._search_slot = tasks.TaskSlot()   # 新搜索会取消还在进行的旧搜索
+        self._search_keys: set[str] = set()
+        self._search_done = 0
+        self._search_truncated = False
+        self._search_total = None
+        self._startup_reported = False
         self.timer = QTimer()
         self.timer.timeout.connect(self.load_data)
 
         # 关联信号
         self.data_ready.connect(self.on_data_ready)
+        self.cache_ready.connect(self.on_cache_ready)
         self.add_html.connect(self._append_html)
         self.proxy_test_done.connect(self._show_proxy_msg)
-        self.search_finished.connect(self.handle_search_results)
+        self.search_batch.connect(self.handle_search_batch)
+        self.search_finished.connect(self.handle_search_finished)
+        self.poc_ready.connect(self.model.set_poc)
 
-        # 首次加载数据
-        self.load_data()
-
-        # 读取保存的 GitHub Token
+        # 读取保存的 GitHub Token（真正生效在首次查 PoC 时，见 _poc_fetcher）
         cfg = load_cfg()
         if token := cfg.get("github_token"):
-            set_github_token(token)
             self.auth_edit.setText(token)
+        # 首次加载数据放到窗口显示之后：main() 里 show() 后再调 start_up()
 
     # ------------------------------------------------------------------
     # 表头右键菜单：显示/隐藏列
     # ------------------------------------------------------------------
     def show_header_menu(self, pos):
         header = self.table.horizontalHeader()
-        titles = ["名称", "日期", "来源", "等级"]
         menu = QMenu(self)
-        for idx, title in enumerate(titles):
+        for idx, title in enumerate(COLUMNS):
             act = menu.addAction(title)
             act.setCheckable(True)
             act.setChecked(not header.isSectionHidden(idx))
@@ -256,9 +302,10 @@ class MainWindow(QMainWindow):
         src = self.src_combo.currentText()
 
         if src == "ThreatBook":
+            import threatbook
             threatbook.set_cookie(txt)
         else:  # GitHub
-            set_github_token(txt or None)
+            _poc_fetcher().set_github_token(txt or None)
             cfg = load_cfg()
             if txt:
                 cfg["github_token"] = txt
@@ -271,6 +318,7 @@ class MainWindow(QMainWindow):
     # 代理相关
     # ------------------------------------------------------------------
     def apply_proxy(self):
+        from utils import set_proxy
         set_proxy(self.http_edit.text().strip() or None, self.https_edit.text().strip() or None)
         self._flash(self.proxy_btn)
 
@@ -279,9 +327,11 @@ class MainWindow(QMainWindow):
         https_url = self.https_edit.text().strip() or None
 
         def worker():
-            s = requests.Session()
+            import requests
             from utils import _normalize
 
+            s = requests.Session()
+
             http_proxy = _normalize(http_url, "http")
             https_proxy = _normalize(https_url, "https")
             if http_proxy:
@@ -298,7 +348,7 @@ class MainWindow(QMainWindow):
 
             self.proxy_test_done.emit(msg)
 
-        threading.Thread(target=worker, daemon=True).start()
+        tasks.spawn("job", worker)
 
     def _show_proxy_msg(self, msg: str):
         QMessageBox.information(self, "代理测试结果", msg)
@@ -317,35 +367,116 @@ class MainWindow(QMainWindow):
             self.timer.stop()
 
         # ② 清空现有表格和详情（无论 timer 是否在运行，都要清一次）
-        self.full_data.clear()
-        self.table.setRowCount(0)
+        self.model.set_items([])
         self.detail_box.clear()
 
-        # ③ 置灰按钮，防止重复点击
+        # ③ 搜索期间不允许刷新；再次搜索则直接取消上一次
         self.refresh_btn.setEnabled(False)
-        self.search_btn.setEnabled(False)
-
-        # ④ 开线程执行实际搜索
-        def worker():
-            vulns = search_vulns(keyword)  # ⬅️ 调用统一搜索入口
-            self.search_finished.emit(vulns)
 
-        threading.Thread(target=worker, daemon=True).start()
+        # ④ 后台执行实际搜索；哪个源先返回就先合并进表格
+        token = self._search_slot.renew()
+        self._search_keys.clear()
+        self._search_done = 0
+        self._search_truncated = False
+        local = self.local_chk.isChecked()
+        self._search_total = 1 if local else None
+        if local:
+            # 本地检索结果已按相关度排好，取消列排序，保持原顺序
+            self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.statusBar().showMessage("搜索中…")
 
-    def handle_search_results(self, vulns):
+        def worker():
+            merged = None
+            try:
+                with startup.timed("vuln_search"):
+                    from vuln_search import iter_search, search_local
+                if local:
+                    items = search_local(keyword)
+                    self.search_batch.emit(token, "本地库", list(items), items.truncated)
+                    return
+                raw = []
+                for name, items in iter_search(keyword):  # ⬅️ 统一搜索入口（默认预算）
+                    raw.extend(items)
+                    self.search_batch.emit(token, name, list(items), items.truncated)
+                # 边搜边显示时只按 CVE / 名称_日期 去重；全部返回后再跨源合并成完整记录
+                from merge import merge_items
+                merged = merge_items(raw)
+                if len(merged) == len(raw):
+                    merged = None                  # 没有可合并的，表格不用重置
+            finally:
+                self.search_finished.emit(token, merged)
+
+        tasks.spawn("job", worker, token=token)
+
+    def handle_search_batch(self, token, name: str, items: list, truncated: bool):
+        if token is not self._search_slot.current:
+            return
+        from vuln_search import SEARCHERS
+        self._search_done += 1
+        self._search_truncated |= truncated
+        fresh = []
+        for it in items:
+            key = it.key
+            if key not in self._search_keys:
+                self._search_keys.add(key)
+                fresh.append(it)
+        self.model.append_items(fresh)
+        self.statusBar().showMessage(
+            f"搜索中… {self._search_done}/{self._search_total or len(SEARCHERS)} 个源已返回（最新: {name}），"
+            f"共 {len(self.full_data)} 条")
+
+    def handle_search_finished(self, token, merged):
+        if token is not self._search_slot.current:
+            return
         self.refresh_btn.setEnabled(True)
-        self.search_btn.setEnabled(True)
+        if merged is not None:
+            self.model.set_items(merged)
 
-        if not vulns:
+        if not self.full_data:
+            self.statusBar().clearMessage()
             QMessageBox.information(self, "无结果", "未找到匹配的漏洞！")
             # 搜索无结果也恢复定时刷新
             if not self.timer.isActive():
                 self.timer.start(30 * 60 * 1000)
             return
 
-        self.full_data = vulns
-        self.page = 0
-        self.update_table()
+        msg = f"共 {len(self.full_data)} 条"
+        if self._search_truncated:
+            msg += "（结果较多，已按搜索预算截断，可换更精确的关键词）"
+        self.statusBar().showMessage(msg)
+    # ------------------------------------------------------------------
+    # 启动：先画窗口，再读本地库出首屏，最后才联网刷新
+    # ------------------------------------------------------------------
+    def paintEvent(self, event):
+        startup.mark("first paint")
+        super().paintEvent(event)
+
+    def start_up(self):
+        self.statusBar().showMessage("正在读取本地缓存…")
+        start = self.date_from.date().toPyDate().isoformat()
+        end = self.date_to.date().toPyDate().isoformat()
+
+        def worker():
+            items = []
+            try:
+                with startup.timed("store"):
+                    import store
+                with startup.timed("sources"):
+                    from sources import FEEDS
+                items = store.cached_range(start, end, FEEDS)
+            except Exception as exc:          # 库坏了 / 打不开：直接走联网刷新
+                print("[store] cache read failed:", exc)
+            self.cache_ready.emit(items)
+
+        tasks.spawn("job", worker)
+
+    def on_cache_ready(self, data: list[VulnItem]):
+        if data and self._search_slot.current is None:     # 用户已经开始搜索就不覆盖
+            startup.mark("first data (cache)")
+            self.model.set_items(data)
+            self.statusBar().showMessage(f"本地缓存 {len(data)} 条，正在更新…")
+        self.load_data()
+
     # ------------------------------------------------------------------
     # 数据抓取
     # ------------------------------------------------------------------
@@ -364,20 +495,47 @@ class MainWindow(QMainWindow):
             return
 
         def worker():
-            data: list[VulnItem] = []
-            cursor = start_date
-            while cursor <= end_date:
-                day_str = cursor.isoformat()
-                data.extend(fetch_all(day_str, DATE_FETCHERS))
-                cursor += dt.timedelta(days=1)
-            self.data_ready.emit(data)
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    def on_data_ready(self, data: list[VulnItem]):
-        self.full_data = sorted(data, key=lambda v: v.name)
-        self.page = 0
-        self.update_table()
+            import sqlite3
+            from utils import fetch_range
+            from store import sync_range
+            from sources import RANGE_FETCHERS, INCREMENTAL_FETCHERS
+
+            # 已定稿的日期直接读本地库，其余每个源在整个范围内只抓一次，再按天去重合并
+            start, end = start_date.isoformat(), end_date.isoformat()
+            data, status = None, {"刷新": "cancelled"}
+            try:
+                try:
+                    data, status = sync_range(start, end, RANGE_FETCHERS,
+                                              incremental=INCREMENTAL_FETCHERS)
+                except sqlite3.Error as exc:
+                    print("[store] unavailable, fetching directly:", exc)
+                    data, status = fetch_range(start, end, RANGE_FETCHERS)
+            except Exception as exc:
+                print("[refresh] failed:", repr(exc))
+                status = {"刷新": f"error: {exc}"}
+            finally:
+                # 无论成败都要发出去：on_data_ready 负责解锁 _mtx、恢复刷新按钮
+                self.data_ready.emit(data, status)
+
+        tasks.spawn("job", worker)
+
+    def on_data_ready(self, data: Optional[list[VulnItem]], status: dict):
+        startup.mark("first data (network)")
+        if not self._startup_reported:
+            self._startup_reported = True
+            print(startup.report())
+        if data is not None:
+            self.model.set_items(data)
+        failed = [f"{name}({st})" for name, st in status.items()
+                  if st not in ("ok", "cached") and not st.startswith("degraded")]
+        degraded = [name for name, st in status.items() if st.startswith("degraded")]
+        msg = []
+        if failed:
+            msg.append("部分数据源异常: " + ", ".join(failed))
+        if degraded:
+            # 熔断中的源本轮直接跳过，表里是本地库已有的数据
+            msg.append("已降级（熔断中，稍后自动重试）: " + ", ".join(degraded))
+        self.statusBar().showMessage("；".join(msg) or f"共 {len(data or [])} 条")
         self.refresh_btn.setEnabled(True)
         self._mtx.unlock()
         if data and not self.timer.isActive():
@@ -395,24 +553,55 @@ class MainWindow(QMainWindow):
         self.detail_box.clear()
         self.table.clearSelection()
 
-    def update_table(self):
-        start = self.page * PAGE_SIZE
-        rows = self.full_data[start : start + PAGE_SIZE]
-
-        self.table.setRowCount(len(rows))
-        for r, v in enumerate(rows):
-            for c, text in enumerate([v.name, v.date, v.source, v.severity or ""]):
-                itm = QTableWidgetItem(text)
-                if c == 3 and v.severity in SEV_COLOR:
-                    itm.setForeground(SEV_COLOR[v.severity])
-                self.table.setItem(r, c, itm)
-
-        self.prev_btn.setEnabled(self.page > 0)
-        self.next_btn.setEnabled(start + PAGE_SIZE < len(self.full_data))
-
-    def change_page(self, delta: int):
-        self.page += delta
-        self.update_table()
+    # ------------------------------------------------------------------
+    # 本地筛选
+    # ------------------------------------------------------------------
+    def apply_filter(self):
+        f = RowFilter(
+            source=self.f_source.currentData() or "",
+            severity=self.f_severity.currentData() or "",
+            date=self.f_date.text(),
+            cve=self.f_cve.text(),
+            name=self.f_name.text(),
+        )
+        self.model.set_filter(f)
+        if not f.is_empty():
+            self.statusBar().showMessage(f"筛选后 {self.model.rowCount()} / {len(self.full_data)} 条")
+
+    def clear_filter(self):
+        for w in (self.f_source, self.f_severity, self.f_date, self.f_cve, self.f_name):
+            w.blockSignals(True)
+        self.f_source.setCurrentIndex(0)
+        self.f_severity.setCurrentIndex(0)
+        for edit in (self.f_date, self.f_cve, self.f_name):
+            edit.clear()
+        for w in (self.f_source, self.f_severity, self.f_date, self.f_cve, self.f_name):
+            w.blockSignals(False)
+        self.apply_filter()
+
+    def _refresh_filter_choices(self, *_):
+        """来源 / 等级下拉框只列出表格里实际出现的值，保留当前选择"""
+        idx = self.model.filter_index
+        for combo, values in ((self.f_source, idx.by_source), (self.f_severity, idx.by_severity)):
+            current = combo.currentData()
+            wanted = sorted(values)
+            if [combo.itemData(i) for i in range(1, combo.count())] == wanted:
+                continue
+            combo.blockSignals(True)
+            while combo.count() > 1:
+                combo.removeItem(1)
+            for v in wanted:
+                combo.addItem(v, v)
+            pos = combo.findData(current) if current else 0
+            combo.setCurrentIndex(max(pos, 0))
+            combo.blockSignals(False)
+            if current and pos < 0:               # 之前选的值已不在数据里
+                self.apply_filter()
+
+    @property
+    def full_data(self) -> list[VulnItem]:
+        """表格里当前的全部条目（按当前排序，不受过滤影响）"""
+        return self.model.all_items
 
     # ------------------------------------------------------------------
     # 详情
@@ -423,28 +612,89 @@ class MainWindow(QMainWindow):
         cursor.insertHtml(html)
         self.detail_box.setTextCursor(cursor)
 
-    def show_detail(self, row: int, _col: int):
-        idx = self.page * PAGE_SIZE + row
-        item = self.full_data[idx]
+    def show_detail(self, index):
+        item = index.data(ItemRole)
+        if item is None:
+            return
 
         # 基本信息
-        self._click_token += 1
-        token = self._click_token
+        token = self._poc_slot.renew()
         self.detail_box.setHtml("<br>".join(escape(item.display_block()).splitlines()))
 
         # 异步搜索 GitHub PoC
         def worker():
+            pf = _poc_fetcher()
+            wait = pf.rate_limit_wait()
+            if wait > 1:
+                self.add_html.emit(f"<br><i>GitHub 搜索配额已用完，未缓存的 PoC 约 {wait:.0f} 秒后查询…</i>")
             try:
-                urls = fetch_poc_urls(item.cve, item.name, item.cve or item.tags)[:2]
+                urls = pf.fetch_poc_urls(*_poc_args(item))
+            except tasks.Cancelled:
+                return
             except Exception as exc:
                 print("[PoC] error:", exc)
-                urls = []
-            if not urls or token != self._click_token:
+                urls = None
+            if urls is None:
+                # 查询失败不等于“没有 PoC”：PoC 列保持空白，之后还会重查
+                if not token.cancelled:
+                    self.add_html.emit("<br><i>PoC 查询失败，稍后重新点开可重试</i>")
+                return
+            urls = urls[:2]
+            if item.cve:
+                self.poc_ready.emit(item.cve, len(urls))
+            if not urls or token.cancelled:
                 return
             links = "<br>".join(f'<a href="{u}">{u}</a>' for u in urls)
             self.add_html.emit(f"<br><b>[PoC/EXP]</b><br>{links}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        tasks.spawn("poc", worker, token=token)
+
+    # ------------------------------------------------------------------
+    # PoC 预取
+    # ------------------------------------------------------------------
+    def _visible_items(self) -> list[VulnItem]:
+        first = self.table.rowAt(0)
+        if first < 0:
+            return []
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = self.model.rowCount() - 1
+        return [self.model.index(r, 0).data(ItemRole) for r in range(first, last + 1)]
+
+    def prefetch_poc(self):
+        """
+        以最低优先级在后台查当前可见、带 CVE、还没查过的行的 PoC：
+        结果进 PoC 缓存（之后点击直接命中）并显示在 PoC 列；
+        可见行变了就取消上一批还在排队的查询，限流由 poc_fetcher 的调度器负责
+        """
+        items, seen = [], set()
+        for it in self._visible_items():
+            if it.cve and it.cve not in seen and self.model.poc_count(it) is None:
+                seen.add(it.cve)
+                items.append(it)
+        cves = [it.cve for it in items]
+        if cves == self._prefetch_cves:
+            return                              # 还是这一批，让正在进行的预取继续
+        self._prefetch_cves = cves
+        token = self._prefetch_slot.renew()
+        if not items:
+            return
+
+        def worker():
+            pf = _poc_fetcher()
+            for it in items:
+                try:
+                    urls = pf.fetch_poc_urls(*_poc_args(it), priority=pf.PRIORITY_PREFETCH)
+                except tasks.Cancelled:
+                    return
+                except Exception as exc:
+                    print("[PoC] prefetch error:", exc)
+                    continue
+                if urls is None:
+                    continue                    # 查询失败：不标记，该行下次预取时重查
+                self.poc_ready.emit(it.cve, len(urls[:2]))
+
+        tasks.spawn("poc", worker, token=token)
 
 
 # ---------------------------------------------------------------------------
@@ -455,6 +705,8 @@ def main() -> None:
     app = QApplication(sys.argv)
     win = MainWindow()
     win.show()
+    startup.mark("window shown")
+    QTimer.singleShot(0, win.start_up)
     sys.exit(app.exec())
 
 
@@ -0,0 +1,170 @@
+# merge.py
+"""
+跨源合并（实体消解）
+
+同一个漏洞常被几个源同时收录：CVE 相同的直接归为一组，没有 CVE 但
+去重键（VulnItem.key = 名称_日期）完全相同的也直接归为一组（同一源重复的行也这样合掉）；
+其余没有 CVE 的条目再按标题相似度归组——标题先规范化（小写、去掉标点空白和“漏洞”之类的套话），
+切成字符二元组，用 MinHash 签名 + LSH 分段找候选，只对候选算精确 Jaccard，
+不做两两比较。标题相近但 CVE 不同、来源重叠或日期相差太远的不合并。
+
+每组合成一条：名称取排在最前的源，日期取最早（空日期不算），等级取最高，
+来源 / 标签 / 参考链接取并集，描述取最长的一条；只有一条的组原样返回。
+"""
+
+from __future__ import annotations
+import datetime as dt
+import random, re, zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from models import SEV_RANK, SOURCE_SEP, VulnItem
+
+SIMILARITY = 0.6          # 标题二元组 Jaccard 相似度不低于此值才合并
+TITLE_MAX_DAYS = 7        # 按标题合并时，两条的日期最多相差几天
+
+_BANDS, _ROWS = 10, 3     # LSH：签名 30 个值分 10 段，任一段完全相同即为候选（J=0.6 时约 91% 召回）
+_MASK = (1 << 32) - 1
+_rnd = random.Random(20250101)
+_PERMS = [(_rnd.randrange(1, _MASK) | 1, _rnd.randrange(_MASK)) for _ in range(_BANDS * _ROWS)]
+_shingle_sig: Dict[str, tuple] = {}   # 二元组 → 各个哈希函数下的值；常见二元组就那么些，算一次复用
+_BUCKET_CAP = 8           # 同一个桶里每条最多和前面多少条比较（防止套话标题挤成大桶）
+
+_NOISE = re.compile(r"漏洞|vulnerability|vulnerabilities|存在|[\W_]+", re.I)
+_TAG_SEP = re.compile(r"[,，、;；|]+")
+
+
+def normalize_title(title: str) -> str:
+    return _NOISE.sub("", title.lower())
+
+def _shingles(title: str) -> FrozenSet[str]:
+    t = normalize_title(title)
+    if len(t) < 2:
+        return frozenset([t]) if t else frozenset()
+    return frozenset(t[i:i + 2] for i in range(len(t) - 1))
+
+def _minhash(shingles: FrozenSet[str]) -> List[int]:
+    sigs = []
+    for s in shingles:
+        sig = _shingle_sig.get(s)
+        if sig is None:
+            h = zlib.crc32(s.encode())     # 不能用 hash()：字符串哈希每个进程随机，合并结果会随之变化
+            sig = _shingle_sig[s] = tuple((a * h + b) & _MASK for a, b in _PERMS)
+        sigs.append(sig)
+    return list(map(min, *sigs)) if len(sigs) > 1 else list(sigs[0])
+
+def _day(date: str) -> Optional[dt.date]:
+    try:
+        return dt.date.fromisoformat(date[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class _Clusters:
+    """并查集；每个根记着该组的 CVE 和来源集合，合并前用来检查是否冲突"""
+
+    def __init__(self, items: List[VulnItem]):
+        self.parent = list(range(len(items)))
+        self.cves: List[Set[str]] = [{it.cve.upper()} if it.cve else set() for it in items]
+        self.sources: List[Set[str]] = [set(it.sources) for it in items]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        a, b = self.find(i), self.find(j)
+        if a == b:
+            return
+        if b < a:
+            a, b = b, a                 # 根取靠前的那条，保持先到的源优先
+        self.parent[b] = a
+        self.cves[a] |= self.cves[b]
+        self.sources[a] |= self.sources[b]
+
+    def compatible(self, i: int, j: int) -> bool:
+        a, b = self.find(i), self.find(j)
+        if a == b:
+            return False
+        if self.cves[a] and self.cves[b] and self.cves[a] != self.cves[b]:
+            return False
+        return not (self.sources[a] & self.sources[b])
+
+
+def _union_titles(items: List[VulnItem], cl: _Clusters) -> None:
+    shingles = [_shingles(it.name) for it in items]
+    days = [_day(it.date) for it in items]
+    has_cve = [bool(it.cve) for it in items]
+    buckets: Dict[tuple, List[int]] = {}
+    checked: Set[tuple] = set()
+    sig_of: Dict[FrozenSet[str], List[int]] = {}   # 各源标题常常一字不差，签名只算一次
+    for i, sh in enumerate(shingles):
+        if not sh:
+            continue
+        sig = sig_of.get(sh)
+        if sig is None:
+            sig = sig_of[sh] = _minhash(sh)
+        for band in range(_BANDS):
+            key = (band, *sig[band * _ROWS:(band + 1) * _ROWS])
+            peers = buckets.setdefault(key, [])
+            for j in peers[-_BUCKET_CAP:]:
+                if has_cve[i] and has_cve[j] or (j, i) in checked:
+                    continue            # 都有 CVE：已经按 CVE 处理过
+                checked.add((j, i))
+                if days[i] and days[j] and abs((days[i] - days[j]).days) > TITLE_MAX_DAYS:
+                    continue
+                if not cl.compatible(i, j):
+                    continue
+                inter = len(shingles[i] & shingles[j])
+                if inter >= SIMILARITY * (len(shingles[i]) + len(shingles[j]) - inter):
+                    cl.union(i, j)
+            peers.append(i)
+
+def _union_text(values: Iterable[Optional[str]], sep: re.Pattern, joiner: str) -> Optional[str]:
+    seen: Dict[str, None] = {}
+    for v in values:
+        for part in sep.split(v or ""):
+            part = part.strip()
+            if part:
+                seen.setdefault(part, None)
+    return joiner.join(seen) or None
+
+def merge_group(group: List[VulnItem]) -> VulnItem:
+    """把同一个漏洞的多条记录合成一条（group[0] 的源优先）"""
+    if len(group) == 1:
+        return group[0]
+    first = group[0]
+    sources = list(dict.fromkeys(s for it in group for s in it.sources))
+    severity = max((it.severity for it in group if it.severity),
+                   key=lambda s: SEV_RANK.get(s, 0), default=first.severity)
+    return VulnItem(
+        name=first.name,
+        cve=next((it.cve for it in group if it.cve), None),
+        date=min((it.date for it in group if it.date), default=first.date),
+        severity=severity,
+        tags=_union_text((it.tags for it in group), _TAG_SEP, ", "),
+        source=SOURCE_SEP.join(sources),
+        description=max((it.description or "" for it in group), key=len) or None,
+        reference=_union_text((it.reference for it in group), re.compile(r"\s*\n\s*"), "\n"),
+    )
+
+def merge_items(items: Iterable[VulnItem]) -> List[VulnItem]:
+    """
+    跨源合并；返回顺序为每组第一条出现的位置（排在前面的源 / 日期优先）
+    只有全部条目都带 CVE 时不会走标题相似度这一步
+    """
+    items = list(items)
+    cl = _Clusters(items)
+    by_key: Dict[tuple, int] = {}
+    for i, it in enumerate(items):
+        # 先按精确键归组（CVE 不分大小写；无 CVE 的按 名称_日期），不看来源是否重叠
+        key = ("cve", it.cve.upper()) if it.cve else ("key", it.key)
+        cl.union(by_key.setdefault(key, i), i)
+    if any(not it.cve for it in items):
+        _union_titles(items, cl)
+
+    groups: Dict[int, List[VulnItem]] = {}
+    for i, it in enumerate(items):
+        groups.setdefault(cl.find(i), []).append(it)
+    return [merge_group(g) for g in groups.values()]
@@ -1,8 +1,24 @@
+import sys
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
+
+# 合并后的条目 source 为各源用 SOURCE_SEP 连起来（见 merge.py）
+SOURCE_SEP = " / "
+
+# 等级的先后（越大越严重）；未知等级排最低
+SEV_RANK = {"中危": 1, "高风险": 2, "高危": 2, "极危": 3, "严重": 3}
+
+def _intern(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if type(s) is str else s
 
 @dataclass
 class VulnItem:
+    """
+    一条漏洞记录；用 __slots__ 不带 __dict__（长区间本地库一次加载几万条）
+    来源 / 等级 / 日期 / 标签只有少数几种取值，构造时驻留，所有条目共用同一个字符串对象
+    """
+    __slots__ = ("name", "cve", "date", "severity", "tags", "source", "description", "reference")
+
     name: str
     cve: Optional[str]
     date: str  # YYYY‑MM‑DD
@@ -12,6 +28,21 @@ class VulnItem:
     description: Optional[str]
     reference: Optional[str]
 
+    def __post_init__(self):
+        self.date = _intern(self.date)
+        self.severity = _intern(self.severity)
+        self.tags = _intern(self.tags)
+        self.source = _intern(self.source)
+
+    @property
+    def key(self) -> str:
+        """去重键：CVE，无则 名称_日期"""
+        return self.cve or f"{self.name}_{self.date}"
+
+    @property
+    def sources(self) -> List[str]:
+        return self.source.split(SOURCE_SEP)
+
     def display_block(self) -> str:
         return (
             f"【漏洞名称】{self.name}\n"
@@ -22,4 +53,30 @@ class VulnItem:
             f"【漏洞来源】{self.source}\n"
             f"【漏洞描述】{self.description or ''}\n"
             f"【参考链接】{self.reference or ''}\n"
-        )
\ No newline at end of file
+        )
+
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """关键词搜索的预算（每个源各自计算）；None 表示该项不限"""
+    max_pages: Optional[int] = 20        # 最多翻多少页
+    max_results: Optional[int] = 1000    # 最多返回多少条
+    time_limit: Optional[float] = 60.0   # 最多花多少秒
+
+
+DEFAULT_BUDGET = SearchBudget()
+
+
+class SearchResult(list):
+    """
+    search_* 的返回值：就是 VulnItem 列表，另带
+      truncated —— 预算用完提前返回、或翻页中途出错时为 True
+      error     —— 翻页中途出错时的错误信息；结果是出错前已取到的部分，不应缓存
+    """
+    truncated: bool = False
+    error: Optional[str] = None
+
+    def __init__(self, items=(), truncated: bool = False, error: Optional[str] = None):
+        super().__init__(items)
+        self.truncated = truncated or error is not None
+        self.error = error
@@ -6,55 +6,79 @@ OSCS 开源安全情报
     https://www.oscs1024.com/oscs/v1/intelligence/list   (POST, JSON)
 
 功能:
-    - fetch_oscs(date)     —— 仍按日期抓取 (高危/严重)
-    - search_oscs(keyword) —— 新增关键词 / CVE 搜索
+    - fetch_oscs(date)                —— 仍按日期抓取 (高危/严重)
+    - fetch_oscs_range(start, end)    —— 日期范围抓取，列表只翻一遍
+    - search_oscs(keyword, budget)    —— 新增关键词 / CVE 搜索，可限页数 / 条数 / 时间
+    - fetch_oscs_since(start, end, marker) —— 增量抓取，碰到上次已入库的行即停
+    以上均有 async 版本 (afetch_oscs / afetch_oscs_range / afetch_oscs_since / asearch_oscs)，
+    同步函数只是 run_sync() 包装
 """
 
-from typing import List
-import random, time
-from models import VulnItem
-from utils import _session
+from typing import Dict, List, Optional, Tuple
+import resilience
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult, VulnItem
+from utils import Marker, bucket_by_date
+from async_http import run_sync
+from paging import PageBudget, iter_pages
 
 LIST_API = "https://www.oscs1024.com/oscs/v1/intelligence/list"
 LEVEL_OK = {"严重", "高危"}        # 要“中危”也算就加进去
 
 # ------------------------- 内部通用函数 -------------------------
 
-def _post_page(page: int, per_page: int = 100, keyword: str = "") -> dict:
+async def _post_page(page: int, per_page: int = 100, keyword: str = "") -> dict:
     """
-    POST 请求分页列表；服务器 5xx 时重试 ≤ 3 次
-    返回形如 {"data":{"data":[…]}} 的最外层 dict
+    POST 请求分页列表；5xx / 超时的重试与熔断见 resilience
+    返回形如 {"data":{"data":[…]}} 的最外层 dict；失败一律抛异常（熔断中为 BreakerOpen）
     """
     payload = {"page": page, "per_page": per_page}
     if keyword:
         payload["keyword"] = keyword
 
-    for attempt in range(3):
-        try:
-            r = _session.post(LIST_API, json=payload, timeout=8)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            print(f"[OSCS] page {page} attempt {attempt+1}: {e}")
-            time.sleep(random.uniform(1, 2))
-    return {}
+    # 列表查询只读，虽是 POST 也可以安全重试
+    r = await resilience.request(__name__, "POST", LIST_API, idempotent=True,
+                                 json=payload, timeout=8)
+    r.raise_for_status()
+    return r.json()
+
+def _rows(j: dict) -> list:
+    return j.get("data", {}).get("data", [])
+
+def _marker(row: dict) -> Marker:
+    return row["public_time"], str(row.get("id") or row["title"])
+
+def _to_item(row: dict) -> VulnItem:
+    return VulnItem(
+        name=row["title"],
+        cve=row.get("cve_id"),   # 列表有时带 cve_id；若无留空
+        date=row["public_time"].split("T")[0],
+        severity=row["level"],
+        tags=None,
+        source="OSCS",
+        description=row.get("desc") or row.get("description"),
+        reference=row.get("url"),
+    )
 
 # --------------------------- 搜索 ---------------------------
 
-def search_oscs(keyword: str) -> List[VulnItem]:
+async def asearch_oscs(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
     """
     关键词搜索:
         - 以 'CVE-' 开头 (忽略大小写) → 精确匹配 cve_id
         - 否则对 title 做包含匹配 (不区分大小写)
     仅保留 level ∈ LEVEL_OK
+    接口不返回总页数，翻到空页为止；后续页按逐步放大的窗口并发预取
+    budget 用完（页数 / 条数 / 时间）提前返回，结果 truncated=True
     """
     vulns: List[VulnItem] = []
-    page, per_page = 1, 100
+    per_page = 100
     is_cve = keyword.lower().startswith("cve-")
+    pb = PageBudget(budget or DEFAULT_BUDGET)
 
-    while True:
-        j = _post_page(page, per_page, keyword)
-        rows = j.get("data", {}).get("data", [])
+    pages = iter_pages(lambda p: _post_page(p, per_page, keyword),
+                       is_last=lambda j: not _rows(j), budget=pb)
+    async for _, j in pages:
+        rows = _rows(j)
         if not rows:
             break
 
@@ -69,63 +93,83 @@ def search_oscs(keyword: str) -> List[VulnItem]:
                 if keyword.lower() not in row["title"].lower():
                     continue
 
-            vulns.append(
-                VulnItem(
-                    name=row["title"],
-                    cve=row.get("cve_id"),
-                    date=row["public_time"].split("T")[0],
-                    severity=row["level"],
-                    tags=None,
-                    source="OSCS",
-                    description=row.get("desc") or row.get("description"),
-                    reference=row.get("url"),
-                )
-            )
-
-        page += 1
+            vulns.append(_to_item(row))
+            if pb.full(len(vulns)):
+                break
+        if pb.truncated:
+            break
 
-    return vulns
+    return SearchResult(vulns, pb.truncated, pb.error)
 
 # --------------------------- 按日期抓取 ---------------------------
 
-def fetch_oscs(date: str) -> List[VulnItem]:
+async def afetch_oscs_since(start: str, end: str, marker: Optional[Marker] = None
+                            ) -> Tuple[Dict[str, List[VulnItem]], Optional[Marker]]:
     """
-    返回发布日期 == <date> 且 level ∈ LEVEL_OK 的列表
+    返回 start <= 发布日期 <= end 且 level ∈ LEVEL_OK 的条目，按日期分桶
+    给了 marker（上次已入库的最新一行）时，碰到它本身或更早的行就停
+    返回 (分桶结果, 新 marker)；新 marker 为第一条不晚于 end 的行
+    中途某页失败时 _post_page 抛异常，整次抓取作废，不返回半截结果和新 marker
+    （否则没翻到的那几页会被 marker 永远跳过）；空页是列表真正的末尾，算翻完
     """
     vulns: List[VulnItem] = []
+    newest: Optional[Marker] = None
     page, per_page = 1, 100
 
     while True:
-        j = _post_page(page, per_page)
-        rows = j.get("data", {}).get("data", [])
+        j = await _post_page(page, per_page)
+        rows = _rows(j)
         if not rows:
             break
 
+        seen = False
         for row in rows:
-            pub_date = row["public_time"].split("T")[0]
-            if pub_date != date:
+            mk = _marker(row)
+            if marker and (mk == marker or mk[0] < marker[0]):
+                seen = True
+                break
+            pub_date = mk[0].split("T")[0]
+            if pub_date > end:
+                continue
+            newest = newest or mk
+            if pub_date < start:
                 continue
             if row["level"] not in LEVEL_OK:
                 continue
+            vulns.append(_to_item(row))
 
-            vulns.append(
-                VulnItem(
-                    name=row["title"],
-                    cve=row.get("cve_id"),   # 列表有时带 cve_id；若无留空
-                    date=pub_date,
-                    severity=row["level"],
-                    tags=None,
-                    source="OSCS",
-                    description=row.get("desc") or row.get("description"),
-                    reference=row.get("url"),
-                )
-            )
-
-        # 列表按时间倒序；如果最后一条已早于目标日期就不用翻下去了
+        # 列表按时间倒序；如果最后一条已早于起始日期就不用翻下去了
         last_date = rows[-1]["public_time"].split("T")[0]
-        if last_date < date:
+        if seen or last_date < start:
             break
 
         page += 1
 
-    return vulns
+    return bucket_by_date(vulns, start, end), newest or marker
+
+async def afetch_oscs_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    """
+    返回 start <= 发布日期 <= end 且 level ∈ LEVEL_OK 的条目，按日期分桶
+    """
+    return (await afetch_oscs_since(start, end))[0]
+
+async def afetch_oscs(date: str) -> List[VulnItem]:
+    """
+    返回发布日期 == <date> 且 level ∈ LEVEL_OK 的列表
+    """
+    return (await afetch_oscs_range(date, date))[date]
+
+# --------------------------- 同步包装 ---------------------------
+
+def search_oscs(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    return run_sync(asearch_oscs(keyword, budget))
+
+def fetch_oscs_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    return run_sync(afetch_oscs_range(start, end))
+
+def fetch_oscs_since(start: str, end: str, marker: Optional[Marker] = None
+                     ) -> Tuple[Dict[str, List[VulnItem]], Optional[Marker]]:
+    return run_sync(afetch_oscs_since(start, end, marker))
+
+def fetch_oscs(date: str) -> List[VulnItem]:
+    return run_sync(afetch_oscs(date))
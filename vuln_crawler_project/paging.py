@@ -0,0 +1,131 @@
+# paging.py
+"""
+分页预取
+
+iter_pages() 取到第 1 页后，把后续页并发提前请求，再按页码顺序逐页 yield：
+- 已知总页数（total）→ 一次放出 window 页的预取窗口
+- 只知道“还有下一页”或什么都不知道 → 窗口从 1 开始逐页翻倍到 window，
+  结果只有一两页时不会白白多打一堆请求
+实际并发仍受 async_http 的每 host 上限约束；调用方中途 break 时，
+未用上的预取请求会被取消。
+
+PageBudget 是一次搜索在单个源上的预算（页数 / 条数 / 截止时间）：iter_pages 到达
+页数或时间上限就停（不会预取超出上限的页），调用方用 full() 检查条数；
+任一上限触发都会把 budget.truncated 置 True，调用方据此给结果打“已截断”标记。
+带 budget 时第 2 页起某页请求失败也就此停下：错误记进 budget.error、truncated 置 True，
+调用方照常返回已取到的部分（第 1 页失败则直接抛出，没有可返回的东西）。
+"""
+
+from __future__ import annotations
+import asyncio, time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import utils
+from models import SearchBudget
+
+PageFetcher = Callable[[int], Awaitable[Any]]
+
+
+class PageBudget:
+    """SearchBudget 的运行态：从创建时开始计时"""
+
+    def __init__(self, budget: SearchBudget):
+        self.max_pages = budget.max_pages
+        self.max_results = budget.max_results
+        self.deadline = time.monotonic() + budget.time_limit if budget.time_limit else None
+        self.truncated = False
+        self.error: Optional[str] = None       # 中途某页失败时的错误信息
+
+    def fail(self, exc: BaseException) -> None:
+        self.error = repr(exc)
+        self.truncated = True
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def full(self, n: int) -> bool:
+        """已收集 n 条时是否到达条数上限（到达即标记 truncated）"""
+        if self.max_results is not None and n >= self.max_results:
+            self.truncated = True
+        return self.truncated
+
+    async def wait(self, aw: Awaitable[Any]) -> Any:
+        """在剩余时间内等结果；超时抛 asyncio.TimeoutError 并标记 truncated"""
+        remaining = self.remaining()
+        if remaining is None:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, remaining)
+        except asyncio.TimeoutError:
+            self.truncated = True
+            raise
+
+
+async def _wait(aw: Awaitable[Any], budget: Optional[PageBudget]) -> Any:
+    return await (budget.wait(aw) if budget else aw)
+
+async def iter_pages(fetch: PageFetcher, *,
+                     is_last: Callable[[Any], bool],
+                     total: Optional[Callable[[Any], Optional[int]]] = None,
+                     window: Optional[int] = None,
+                     budget: Optional[PageBudget] = None) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    fetch(page)   —— 取第 page 页（从 1 开始），返回该源原始的分页数据
+    is_last(data) —— 该页是否为最后一页（空页 / hasNext=False 等），最后一页仍会 yield
+    total(data)   —— 可选，从第 1 页数据里读出总页数
+    window        —— 最多提前请求的页数，默认 utils.POOL_PER_HOST
+    budget        —— 可选的页数 / 时间预算，用完即停并标记 truncated；
+                     第 2 页起请求失败也停，错误记进 budget.error
+    """
+    window = max(1, window or utils.POOL_PER_HOST)
+    try:
+        data = await _wait(fetch(1), budget)
+    except asyncio.TimeoutError:
+        if budget is None or not budget.truncated:
+            raise                          # 请求本身超时，不是时间预算用完
+        return
+    if is_last(data):
+        yield 1, data
+        return
+
+    last = total(data) if total else None
+    cap = budget.max_pages if budget and budget.max_pages else None
+    ahead = window if last else 1
+    tasks: Dict[int, asyncio.Future] = {}
+    page, nxt = 1, 2
+    try:
+        while True:
+            # 补满预取窗口
+            while nxt <= page + ahead and (last is None or nxt <= last) \
+                    and (cap is None or nxt <= cap):
+                tasks[nxt] = asyncio.ensure_future(fetch(nxt))
+                nxt += 1
+
+            yield page, data
+
+            page += 1
+            if page not in tasks:
+                if cap is not None and page > cap and (last is None or page <= last):
+                    budget.truncated = True    # 还有下一页，但页数预算用完了
+                break
+            try:
+                data = await _wait(asyncio.shield(tasks[page]), budget)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and budget is not None and budget.truncated:
+                    break                  # 时间预算用完
+                if budget is None:
+                    raise
+                print(f"[paging] page {page} failed, stopping early: {e!r}")
+                budget.fail(e)
+                break
+            tasks.pop(page)
+            if is_last(data):
+                yield page, data
+                break
+            if last is None:
+                ahead = min(window, ahead * 2)
+    finally:
+        for t in tasks.values():
+            t.cancel()
@@ -2,14 +2,25 @@
 GitHub PoC / EXP 聚合器
 -----------------------
 search_github  —— 关键词列表 → GitHub Repos 搜索结果 URL
-fetch_poc_urls —— (cve, 漏洞名, 其它编号) → 去重 URL 列表
+fetch_poc_urls —— (cve, 漏洞名, 其它编号) → 去重 URL 列表（查询失败为 None）
 set_github_token —— 供 GUI 动态注入 / 清空 PAT
+
+结果缓存在 ~/.vuln_crawler_cache/github_poc_cache.db（SQLite，按键主键查询）：
+每条各自过期（找到 PoC 24 h，没找到 6 h），查询出错不缓存；
+超过 CACHE_MAX 条时按最近使用时间淘汰
+
+缓存没命中的查询交给 PocScheduler：单线程按优先级排队（刚点的行最先，预取最后），
+用共享的连接池 session 发请求，按 GitHub 的限流响应头控制节奏，配额用完就等到重置时间
 """
 
 from __future__ import annotations
-import json, re, time, threading, requests
+import heapq, itertools, json, re, sqlite3, time, threading
+from concurrent.futures import CancelledError, Future
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+
+import tasks
+from utils import _session
 
 # ---------- 基本常量 ----------
 GITHUB_API = "https://api.github.com/search/repositories"
@@ -18,9 +29,11 @@ HEADERS = {
     "User-Agent": "vuln-crawler/1.2",
 }
 CACHE_DIR  = Path.home() / ".vuln_crawler_cache"
-CACHE_FILE = CACHE_DIR / "github_poc_cache.json"
-CACHE_TTL  = 24 * 3600          # 24 h
-_LOCK = threading.Lock()
+CACHE_DB   = CACHE_DIR / "github_poc_cache.db"
+LEGACY_CACHE_FILE = CACHE_DIR / "github_poc_cache.json"   # 旧版整文件缓存，首次打开时导入
+CACHE_TTL  = 24 * 3600          # 24 h，找到了 PoC
+NEG_TTL    = 6 * 3600           # 6 h，没找到（新 PoC 常在披露后几小时内出现）
+CACHE_MAX  = 5000               # 最多保留的条数
 
 # ---------- Token 注入 ----------
 def set_github_token(token: str | None):
@@ -30,50 +43,289 @@ def set_github_token(token: str | None):
         HEADERS.pop("Authorization", None)
 
 # ---------- 缓存 ----------
-def _load_cache() -> dict:
-    if CACHE_FILE.exists() and time.time() - CACHE_FILE.stat().st_mtime < CACHE_TTL:
+class PocCache:
+    """
+    key → URL 列表；每条带自己的过期时间和最近使用时间
+    一个连接 + 一把锁，每次查 / 写都只碰一行；淘汰每 _PRUNE_EVERY 次写入做一次
+    """
+
+    _PRUNE_EVERY = 100
+
+    def __init__(self, path: Path = CACHE_DB, max_entries: int = CACHE_MAX):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS poc_cache (
+                    key     TEXT PRIMARY KEY,
+                    urls    TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    used    REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS poc_cache_used ON poc_cache (used);
+            """)
+        self._import_legacy()
+
+    def _import_legacy(self) -> None:
+        """旧 JSON 缓存里还没过期的条目按文件 mtime 算过期时间导入，然后删掉旧文件"""
+        if not LEGACY_CACHE_FILE.exists():
+            return
         try:
-            return json.loads(CACHE_FILE.read_text())
-        except Exception:
+            mtime = LEGACY_CACHE_FILE.stat().st_mtime
+            old = json.loads(LEGACY_CACHE_FILE.read_text())
+            for key, urls in old.items():
+                ttl = CACHE_TTL if urls else NEG_TTL
+                if mtime + ttl > time.time():
+                    self.put(key, urls, ttl=mtime + ttl - time.time())
+            LEGACY_CACHE_FILE.unlink()
+        except Exception as e:
+            print("[PoC] legacy cache import skipped:", e)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """未过期的缓存结果（可能是空列表 = 之前没找到），没有则 None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT urls, expires FROM poc_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM poc_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE poc_cache SET used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, urls: List[str], ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = CACHE_TTL if urls else NEG_TTL
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO poc_cache (key, urls, expires, used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(urls), now + ttl, now))
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """删掉过期的，再按最近使用时间把超出 max_entries 的部分淘汰（调用方持锁）"""
+        self._conn.execute("DELETE FROM poc_cache WHERE expires < ?", (now,))
+        self._conn.execute(
+            "DELETE FROM poc_cache WHERE key IN (SELECT key FROM poc_cache "
+            "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+_cache: Optional[PocCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> PocCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PocCache()
+    return _cache
+
+# ---------- 限流调度 ----------
+PRIORITY_CLICK    = 0           # 用户刚点的行
+PRIORITY_PREFETCH = 10          # 后台预取
+PREFETCH_RESERVE  = 2           # 剩余配额不多于这么多时，预取等到重置，留给点击
+_MAX_ATTEMPTS = 3               # 被限流后最多重新排队几次
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+class RateLimit:
+    """
+    GitHub 搜索配额的令牌桶：剩余令牌数与重置时间以每次响应的
+    X-RateLimit-Remaining / X-RateLimit-Reset（以及 Retry-After）为准，
+    两次响应之间发请求时本地先扣减；桶空了就等到重置时间再发
+    """
+
+    def __init__(self):
+        self.remaining: Optional[int] = None     # None = 还不知道，先放行探一下
+        self.reset_at = 0.0                      # Unix 时间戳
+
+    def wait_time(self, reserve: int = 0) -> float:
+        """还要等多少秒才能发下一个请求；reserve = 需要留着不用的令牌数"""
+        if self.remaining is None or self.remaining > reserve:
+            return 0.0
+        now = time.time()
+        if now < self.reset_at:
+            return self.reset_at - now
+        self.remaining = None                    # 已过重置时间，配额恢复
+        return 0.0
+
+    def take(self) -> None:
+        if self.remaining is not None:
+            self.remaining -= 1
+
+    def update(self, r) -> bool:
+        """按响应头更新；返回这次是否被限流（应等重置后重发）"""
+        h = r.headers
+        try:
+            if "X-RateLimit-Remaining" in h:
+                self.remaining = int(h["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in h:
+                self.reset_at = float(h["X-RateLimit-Reset"])
+        except ValueError:
             pass
-    return {}
+        retry = _retry_after(h.get("Retry-After"))
+        limited = r.status_code == 429 or (
+            r.status_code == 403 and (self.remaining == 0 or retry is not None))
+        if limited:
+            now = time.time()
+            self.remaining = 0
+            if retry is not None:
+                self.reset_at = max(self.reset_at, now + retry)
+            elif self.reset_at <= now:
+                self.reset_at = now + 60         # 没给重置时间：按一分钟窗口
+        return limited
+
+class PocScheduler:
+    """
+    所有 GitHub 查询都经由一个后台线程串行发出（搜索配额每分钟只有 10 / 30 次，并发没有意义）：
+    - 队列按 (优先级, 入队顺序) 排，优先级数字小的先发
+    - 发之前向 RateLimit 取令牌，桶空就等到重置时间；等待期间新来的高优先级请求照样排到最前
+    - 预取请求不用最后 PREFETCH_RESERVE 个令牌，保证点击随时能查
+    - 被限流（403 / 429）的请求放回原位，等重置后重发，最多 _MAX_ATTEMPTS 次
+    - 调用方取消（Future.cancel）的请求出队时直接丢弃，不占配额
+    """
+
+    def __init__(self, session=None):
+        self.limit = RateLimit()
+        self._session = session or _session
+        self._cond = threading.Condition()
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
 
-def _save_cache(d: dict):
-    CACHE_DIR.mkdir(exist_ok=True)
-    CACHE_FILE.write_text(json.dumps(d))
+    def submit(self, q: str, max_hits: int, priority: int = PRIORITY_CLICK) -> Future:
+        """排队一次仓库搜索；Future 的结果是 URL 列表，出错为 None"""
+        fut: Future = Future()
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), q, max_hits, fut, 0))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="poc-scheduler",
+                                                daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return fut
+
+    def wait_time(self) -> float:
+        with self._cond:
+            return self.limit.wait_time()
+
+    def _next(self):
+        """取下一个可以马上发的请求（调用方持锁）；没有就一直等"""
+        while True:
+            while self._heap and self._heap[0][4].cancelled():
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._cond.wait()
+                continue
+            reserve = PREFETCH_RESERVE if self._heap[0][0] >= PRIORITY_PREFETCH else 0
+            delay = self.limit.wait_time(reserve)
+            if delay > 0:
+                self._cond.wait(delay)
+                continue
+            self.limit.take()
+            return heapq.heappop(self._heap)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next()
+            priority, seq, q, max_hits, fut, attempts = job
+            params = {"q": q, "per_page": max_hits, "sort": "updated"}
+            try:
+                r = self._session.get(GITHUB_API, headers=HEADERS, params=params, timeout=10)
+                with self._cond:
+                    limited = self.limit.update(r)
+                    if limited and attempts + 1 < _MAX_ATTEMPTS:
+                        wait = self.limit.wait_time()
+                        heapq.heappush(self._heap, (priority, seq, q, max_hits, fut, attempts + 1))
+                        print(f"[PoC] github rate limited, retrying in {wait:.0f}s")
+                        continue
+                r.raise_for_status()
+                result = [it["html_url"] for it in r.json().get("items", [])]
+            except Exception as e:
+                print("[PoC] github search error:", e)
+                result = None
+            if not fut.done():
+                try:
+                    fut.set_result(result)
+                except Exception:            # 刚好被取消
+                    pass
+
+_scheduler: Optional[PocScheduler] = None
+
+def get_scheduler() -> PocScheduler:
+    global _scheduler
+    with _cache_lock:
+        if _scheduler is None:
+            _scheduler = PocScheduler()
+    return _scheduler
+
+def rate_limit_wait() -> float:
+    """GitHub 搜索配额用完时，还要等多少秒才会发下一个请求（GUI 提示用）"""
+    return get_scheduler().wait_time()
 
 # ---------- 单次仓库查询 ----------
-def _query_repos(q: str, max_hits: int) -> list[str]:
-    params = {"q": q, "per_page": max_hits, "sort": "updated"}
+def _query_repos(q: str, max_hits: int, priority: int = PRIORITY_CLICK) -> Optional[list[str]]:
+    """
+    经调度器排队查询；出错返回 None（与“没搜到”的空列表区分开，出错的结果不进缓存）
+    当前任务的 token 取消时撤回排队中的请求并抛 tasks.Cancelled
+    """
+    fut = get_scheduler().submit(q, max_hits, priority)
+    token = tasks.current_token()
+    if token is not None:
+        token.add_callback(fut.cancel)
     try:
-        r = requests.get(GITHUB_API, headers=HEADERS, params=params, timeout=10)
-        r.raise_for_status()
-        return [it["html_url"] for it in r.json().get("items", [])]
-    except Exception as e:
-        print("[PoC] github search error:", e)
-        return []
+        return fut.result()
+    except CancelledError:
+        raise tasks.Cancelled()
+    finally:
+        if token is not None:
+            token.remove_callback(fut.cancel)
 
 # ---------- 主搜索 ----------
-def search_github(keywords: List[str], max_hits: int = 2) -> List[str]:
+def search_github(keywords: List[str], max_hits: int = 2,
+                  priority: int = PRIORITY_CLICK) -> Optional[List[str]]:
+    """
+    返回最多 max_hits 个仓库 URL；查询出错、一个结果也没拿到时返回 None
+    （与“确实没有 PoC”的空列表区分开，调用方据此显示“查询失败”并允许重试）
+    有查询出错的结果都不进缓存
+    """
     if not keywords:
         return []
 
     cache_key = "|".join(keywords) + f"|{max_hits}"
-    with _LOCK:
-        cache = _load_cache()
-        if cache_key in cache:
-            return cache[cache_key]
+    cache = get_cache()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     hits: list[str] = []
+    failed = False
 
     # ① 精确 —— 只用第一个关键词（通常是 CVE）限制在 name/description
     exact_q = f'"{keywords[0]}" in:name,description'
-    hits += _query_repos(exact_q, max_hits)
+    found = _query_repos(exact_q, max_hits, priority)
+    failed |= found is None
+    hits += found or []
 
     # ② 兜底 —— 其余关键词 OR 补齐
     if len(hits) < max_hits and len(keywords) > 1:
         or_q = " OR ".join(f'"{kw}"' for kw in keywords)
-        for u in _query_repos(or_q, max_hits * 2):
+        found = _query_repos(or_q, max_hits * 2, priority)
+        failed |= found is None
+        for u in found or []:
             if u not in hits:
                 hits.append(u)
             if len(hits) >= max_hits:
@@ -81,9 +333,10 @@ def search_github(keywords: List[str], max_hits: int = 2) -> List[str]:
 
     hits = hits[:max_hits]
 
-    with _LOCK:
-        cache[cache_key] = hits
-        _save_cache(cache)
+    if not failed:
+        cache.put(cache_key, hits)
+    elif not hits:
+        return None
     return hits
 
 # ---------- 名称分词 ----------
@@ -95,7 +348,9 @@ def _extract_name_keywords(name: str) -> List[str]:
 # ---------- 对外 ----------
 def fetch_poc_urls(cve: str | None,
                    vuln_name: str | None,
-                   vuln_id: str | None) -> List[str]:
+                   vuln_id: str | None,
+                   priority: int = PRIORITY_CLICK) -> Optional[List[str]]:
+    """返回值同 search_github：查询失败（一个结果也没拿到）时为 None"""
 
     kws: list[str] = []
     if cve:
@@ -105,4 +360,4 @@ def fetch_poc_urls(cve: str | None,
     if vuln_name:
         kws += _extract_name_keywords(vuln_name)
 
-    return search_github(kws, max_hits=2)
+    return search_github(kws, max_hits=2, priority=priority)
@@ -6,10 +6,12 @@
 ========
 1. 按日期抓取（旧逻辑，保留）
    GET https://ti.qianxin.com/alpha-api/v2/vuln/one-day?date=YYYY-MM-DD
+   接口本身按天，fetch_qianxin_range 逐日各请求一次（并发，受每 host 上限约束）
 
 2. 关键词 / CVE 搜索（新增）
    GET https://ti.qianxin.com/alpha-api/v2/vuln/search
        params: keyword=<str>, page=<int>, page_size=<int>
+   search_qianxin(keyword, budget) 可限页数 / 条数 / 时间，用完提前返回
 
 字段说明（两端点返回行结构相近）
 ------------
@@ -19,10 +21,13 @@
 - rating_level / level        严重度 (高危 / 极危 / 严重 / 中危 / 低危)
 """
 
-from typing import List, Dict, Any
-import time, random
-from models import VulnItem
-from utils import _session
+from typing import List, Dict, Any, Optional
+import asyncio
+import resilience
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult, VulnItem
+from utils import date_range
+from async_http import run_sync
+from paging import PageBudget, iter_pages
 
 API_ONE_DAY   = "https://ti.qianxin.com/alpha-api/v2/vuln/one-day"
 API_SEARCH    = "https://ti.qianxin.com/alpha-api/v2/vuln/search"
@@ -45,6 +50,9 @@ def _collect_rows(obj: Dict[str, Any]) -> List[dict]:
             rows.extend(val)
     return rows
 
+def _search_rows(data: Dict[str, Any]) -> List[dict]:
+    return data.get("rows") or data.get("data") or []
+
 def _pick_level(row: dict) -> str:
     """不同接口的严重度字段兜底"""
     for k in ("rating_level", "level", "risk_level", "rating_level_cn"):
@@ -56,34 +64,36 @@ def _pick_level(row: dict) -> str:
 # 1) 关键词 / CVE 搜索  ------------------------------------------------
 # -------------------------------------------------------------------
 
-def _search_page(keyword: str, page: int, page_size: int = 100) -> Dict[str, Any]:
-    """封装搜索分页请求（含重试）"""
+async def _search_page(keyword: str, page: int, page_size: int = 100) -> Dict[str, Any]:
+    """封装搜索分页请求（重试与熔断见 resilience）；失败抛异常，熔断中为 BreakerOpen"""
     params = {"keyword": keyword, "page": page, "page_size": page_size}
-    for attempt in range(3):
-        try:
-            r = _session.get(API_SEARCH, params=params, timeout=8)
-            r.raise_for_status()
-            return r.json().get("data", {})   # 返回 {"rows":[...], "hasNext":bool}
-        except Exception as e:
-            print(f"[Qianxin search] page {page} attempt {attempt+1}: {e}")
-            time.sleep(random.uniform(1, 2))
-    return {}
-
-def search_qianxin(keyword: str) -> List[VulnItem]:
+    r = await resilience.request(__name__, "GET", API_SEARCH, params=params, timeout=8)
+    r.raise_for_status()
+    return r.json().get("data", {})           # 返回 {"rows":[...], "hasNext":bool}
+
+async def asearch_qianxin(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
     """
     关键词搜索：
       - 以 'CVE-' 开头 → 精确匹配 CVE
       - 否则 → 标题模糊 (不区分大小写)
     结果仅保留 LEVEL_OK
+    有 hasNext 时后续页并发预取（窗口逐步放大），按页码顺序处理
+    budget 用完提前返回，结果 truncated=True
     """
     vulns: List[VulnItem] = []
-    page, page_size = 1, 100
+    page_size = 100
     kw_lower = keyword.lower()
     is_cve = kw_lower.startswith("cve-")
+    pb = PageBudget(budget or DEFAULT_BUDGET)
 
-    while True:
-        data = _search_page(keyword, page, page_size)
-        rows = data.get("rows") or data.get("data") or []
+    def _is_last(data: Dict[str, Any]) -> bool:
+        rows = _search_rows(data)
+        return not rows or (not data.get("hasNext") and len(rows) < page_size)
+
+    pages = iter_pages(lambda p: _search_page(keyword, p, page_size), is_last=_is_last,
+                       budget=pb)
+    async for _, data in pages:
+        rows = _search_rows(data)
         if not rows:
             break
 
@@ -115,21 +125,20 @@ def search_qianxin(keyword: str) -> List[VulnItem]:
                     reference=None,
                 )
             )
-
-        # 翻页控制
-        if not data.get("hasNext") and len(rows) < page_size:
+            if pb.full(len(vulns)):
+                break
+        if pb.truncated:
             break
-        page += 1
 
-    return vulns
+    return SearchResult(vulns, pb.truncated, pb.error)
 
 # -------------------------------------------------------------------
 # 2) 按日期抓取 (保持原状) --------------------------------------------
 # -------------------------------------------------------------------
 
-def fetch_qianxin(date: str) -> List[VulnItem]:
+async def afetch_qianxin(date: str) -> List[VulnItem]:
     """拉取指定日期的高危 / 极危 / 严重漏洞（旧接口）"""
-    resp = _session.get(API_ONE_DAY, params={"date": date}, timeout=8)
+    resp = await resilience.request(__name__, "GET", API_ONE_DAY, params={"date": date}, timeout=8)
     resp.raise_for_status()
 
     rows = _collect_rows(resp.json())
@@ -158,3 +167,33 @@ def fetch_qianxin(date: str) -> List[VulnItem]:
         )
 
     return vulns
+
+async def afetch_qianxin_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    """
+    one-day 接口没有范围参数：逐日各请求一次（并发）
+    任一天失败（重试用完 / 熔断中）整个源按失败处理并上抛，
+    不把失败的日期当成“当天没有漏洞”返回 —— 本地库会把空结果定稿
+    """
+    days = date_range(start, end)
+    results = await asyncio.gather(*(afetch_qianxin(d) for d in days),
+                                   return_exceptions=True)
+    for day, res in zip(days, results):
+        if isinstance(res, BaseException):
+            print(f"[Qianxin] {day}: {res!r}")
+    for res in results:
+        if isinstance(res, BaseException):
+            raise res
+    return dict(zip(days, results))
+
+# -------------------------------------------------------------------
+# 同步包装 -------------------------------------------------------------
+# -------------------------------------------------------------------
+
+def search_qianxin(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    return run_sync(asearch_qianxin(keyword, budget))
+
+def fetch_qianxin(date: str) -> List[VulnItem]:
+    return run_sync(afetch_qianxin(date))
+
+def fetch_qianxin_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    return run_sync(afetch_qianxin_range(start, end))
@@ -1,5 +1,6 @@
 # quick_dump.py
 import sys, json, datetime as dt, pprint
+from dataclasses import asdict
 import changtin, oscs, qianxin, threatbook, cisa
 
 day = sys.argv[1] if len(sys.argv) > 1 else dt.date.today().isoformat()
@@ -15,4 +16,4 @@ raw = {
 for k, v in raw.items():
     print(f"\n=== {k}  {len(v)} item(s) ===")
     for it in v[:3]:          # 只打印前 3 条
-        pprint.pprint(vars(it), width=120)
+        pprint.pprint(asdict(it), width=120)  # VulnItem 用了 __slots__，没有 vars()
@@ -0,0 +1,207 @@
+# resilience.py
+"""
+数据源请求的重试与熔断
+
+request(source, method, url, ...) 代替各源自己写的“失败就 sleep 1~2 秒重试 3 次”：
+- 只重试幂等请求（GET / HEAD，或调用方声明 idempotent=True 的只读 POST）
+  遇到的 5xx / 429 / 超时 / 连接错误；4xx 不重试，直接返回给调用方处理；
+  URL 非法、协议不支持、代理 / 证书配置错之类重试也没用，原样上抛且不计入熔断
+- 退避：指数增长 + 全抖动（0 ~ min(BACKOFF_CAP, BACKOFF_BASE·2^n) 之间随机）；
+  响应带 Retry-After 时按它等，超过 MAX_RETRY_WAIT 就不等了，直接按它熔断（最长 MAX_OPEN）
+- 每个源一个熔断器：连续 FAILURE_THRESHOLD 次请求（重试用完后）失败即打开，
+  打开期间该源的请求立即抛 BreakerOpen，不发网络请求；
+  冷却时间到后放一个试探请求（半开），成功则关闭，失败则冷却时间翻倍（上限 MAX_OPEN）
+- utils._run_sources 把 BreakerOpen 记为 "degraded: …"，刷新时该源瞬间跳过并显示为降级
+"""
+
+from __future__ import annotations
+import asyncio, random, threading, time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+
+try:
+    import httpx
+except ImportError:          # 可选依赖，与 async_http 一致
+    httpx = None
+
+MAX_RETRIES = 2            # 首次之外最多再试几次
+BACKOFF_BASE = 0.5         # 秒
+BACKOFF_CAP = 8.0
+MAX_RETRY_WAIT = 15.0      # Retry-After 超过这个秒数就不原地等了
+
+FAILURE_THRESHOLD = 3
+OPEN_FOR = 60.0            # 首次熔断的冷却时间（秒）
+MAX_OPEN = 30 * 60.0
+
+_IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+# 可重试的传输层错误：超时、连接断开 / 被拒、对端协议错误
+# （requests 的 ProxyError / SSLError 是 ConnectionError 的子类，但属于配置问题，单独排除）
+_TRANSIENT: tuple = (requests.Timeout, requests.ConnectionError, TimeoutError, ConnectionError)
+_PERMANENT: tuple = (requests.exceptions.ProxyError, requests.exceptions.SSLError)
+if httpx is not None:
+    _TRANSIENT += (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+class BreakerOpen(Exception):
+    """该源的熔断器处于打开状态，请求未发出"""
+
+    def __init__(self, source: str, retry_in: float):
+        super().__init__(f"{source} 熔断中，约 {retry_in:.0f}s 后重试")
+        self.source = source
+        self.retry_in = retry_in
+
+
+class RetryableStatus(Exception):
+    """重试用完后仍是 5xx / 429"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class CircuitBreaker:
+    """单个源的熔断器；事件循环线程和 GUI / 工作线程都会读，状态用锁保护"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = OPEN_FOR
+        self._trial = False          # 半开状态下的试探请求是否在途
+
+    def retry_in(self) -> float:
+        """打开状态下还剩多少秒；关闭 / 可试探时为 0"""
+        with self._lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+    def before_call(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.open_until > now:
+                raise BreakerOpen(self.source, self.open_until - now)
+            if self.open_until:                  # 冷却已过：半开，只放一个试探请求
+                if self._trial:
+                    raise BreakerOpen(self.source, 0)
+                self._trial = True
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.open_until:
+                print(f"[breaker] {self.source} closed")
+            self.failures = 0
+            self.open_until = 0.0
+            self.cooldown = OPEN_FOR
+            self._trial = False
+
+    def on_neutral(self) -> None:
+        """请求被取消 / 配置错误：不算成功也不算失败，只结束试探"""
+        with self._lock:
+            self._trial = False
+
+    def on_failure(self, open_for: Optional[float] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            half_open = self._trial
+            self._trial = False
+            if open_for is None:
+                if not half_open and self.failures < FAILURE_THRESHOLD:
+                    return
+                if half_open:
+                    self.cooldown = min(self.cooldown * 2, MAX_OPEN)
+                open_for = self.cooldown
+            self.open_until = time.monotonic() + open_for
+        print(f"[breaker] {self.source} open for {open_for:.0f}s")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def breaker(source: str) -> CircuitBreaker:
+    with _breakers_lock:
+        b = _breakers.get(source)
+        if b is None:
+            b = _breakers[source] = CircuitBreaker(source)
+        return b
+
+def degraded() -> Dict[str, float]:
+    """当前处于熔断中的源 → 剩余秒数"""
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {name: left for name, b in items if (left := b.retry_in()) > 0}
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 可以是秒数，也可以是 HTTP 日期"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _transient(e: BaseException) -> bool:
+    return isinstance(e, _TRANSIENT) and not isinstance(e, _PERMANENT)
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+async def request(source: str, method: str, url: str, *,
+                  idempotent: Optional[bool] = None,
+                  retries: int = MAX_RETRIES,
+                  **kwargs: Any):
+    """
+    经 source 的熔断器发请求（参数同 async_http.request），返回响应对象
+    熔断中抛 BreakerOpen；超时 / 连接错误用完重试后抛原异常，5xx / 429 抛 RetryableStatus；
+    其它异常（配置错误等）不重试直接上抛；4xx 原样返回，由调用方 raise_for_status()
+    """
+    b = breaker(source)
+    b.before_call()
+    try:
+        return await _attempts(b, source, method, url, idempotent, retries, kwargs)
+    except BaseException:
+        # 取消（含退避 sleep 期间被取消）/ 配置错误 / 已记过失败：一律放掉半开试探名额，
+        # 否则 _trial 一直为 True，之后每次 before_call() 都判为熔断，进程重启前恢复不了
+        b.on_neutral()
+        raise
+
+async def _attempts(b: CircuitBreaker, source: str, method: str, url: str,
+                    idempotent: Optional[bool], retries: int, kwargs: Dict[str, Any]):
+    from async_http import request as _request      # 延迟导入：async_http 依赖 utils，utils 依赖本模块
+
+    if idempotent is None:
+        idempotent = method.upper() in _IDEMPOTENT
+    attempts = 1 + (retries if idempotent else 0)
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        try:
+            r = await _request(method, url, **kwargs)
+        except Exception as e:
+            if not _transient(e):                    # 配置 / 用法错误：不是站点的问题，不重试
+                raise
+            if last:
+                b.on_failure()
+                raise
+            print(f"[{source}] {e!r}, retrying")
+            await asyncio.sleep(_backoff(attempt))
+            continue
+
+        if r.status_code < 500 and r.status_code != 429:
+            b.on_success()                           # 4xx 也说明站点在正常应答
+            return r
+
+        wait = _retry_after(r.headers.get("Retry-After"))
+        if wait is not None and wait > MAX_RETRY_WAIT:
+            b.on_failure(open_for=min(wait, MAX_OPEN))   # 服务端明说要等很久：直接熔断到那时
+            raise RetryableStatus(r)
+        if last:
+            b.on_failure()
+            raise RetryableStatus(r)
+        print(f"[{source}] HTTP {r.status_code}, retrying")
+        await asyncio.sleep(wait if wait is not None else _backoff(attempt))
@@ -0,0 +1,27 @@
+# sources.py
+"""
+数据源登记表（不依赖 Qt，GUI 与命令行共用）
+
+- RANGE_FETCHERS      —— 各源的日期范围抓取函数，源名即函数所在模块名
+- INCREMENTAL_FETCHERS —— 分页源的增量版本：有 marker 时翻到上次入库的位置就停
+"""
+
+import changtin
+import oscs
+import qianxin
+import threatbook
+import cisa
+
+RANGE_FETCHERS = [
+    changtin.fetch_changtin_range,
+    oscs.fetch_oscs_range,
+    qianxin.fetch_qianxin_range,
+    threatbook.fetch_threatbook_range,
+    cisa.fetch_cisa_range,
+]
+INCREMENTAL_FETCHERS = {
+    changtin.fetch_changtin_range: changtin.fetch_changtin_since,
+    oscs.fetch_oscs_range: oscs.fetch_oscs_since,
+}
+
+FEEDS = [fn.__module__ for fn in RANGE_FETCHERS]
@@ -0,0 +1,48 @@
+# startup.py
+"""
+GUI 启动计时
+
+- main.py 第一件事就 import 本模块，T0 即计时起点
+- timed(name)   —— 包住一段 import（写成普通 import 语句，PyInstaller 才能分析到依赖），
+                   记下耗时；已经导入过的模块耗时约等于 0，不会重复计入
+- mark(event)   —— 记录某事件第一次发生的时间（首次绘制、首批数据……），重复调用忽略
+- report()      —— 汇总成一段文本；main.py 在拿到首批网络数据后打印一次
+"""
+
+from __future__ import annotations
+import threading, time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+T0 = time.perf_counter()
+
+_lock = threading.Lock()
+_imports: Dict[str, float] = {}
+_marks: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t
+        with _lock:
+            _imports.setdefault(name, dt)
+
+def mark(event: str) -> None:
+    now = time.perf_counter() - T0
+    with _lock:
+        if all(e != event for e, _ in _marks):
+            _marks.append((event, now))
+
+def report() -> str:
+    with _lock:
+        imports = sorted(_imports.items(), key=lambda kv: -kv[1])
+        marks = list(_marks)
+    lines = ["[startup] timing (seconds since main.py start):"]
+    lines += [f"  {event:<24} {at:7.3f}" for event, at in marks]
+    lines.append("[startup] imports:")
+    lines += [f"  {name:<24} {dt * 1000:7.1f} ms" for name, dt in imports]
+    return "\n".join(lines)
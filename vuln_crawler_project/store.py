@@ -0,0 +1,360 @@
+# store.py
+"""
+本地漏洞库（SQLite）
+
+- 抓到的 VulnItem 按 (数据源, 条目键) 存在 ~/.vuln_crawler_cache/vulns.db，
+  数据源即抓取函数所在模块名（changtin / oscs / ...）
+- 每个源记录每一天的同步日期；同步时该天已过去 FINAL_AFTER_DAYS 天即视为定稿，
+  以后直接读库，不再请求
+- 高水位 = 某源已同步的最新日期；刷新只抓范围内还没定稿的那一段，
+  稳定状态下每次只是最近一两天的增量
+- 分页源（Rivers / OSCS）另存一个 marker = 已入库的最新一行 (时间戳, id)；
+  待抓区间与已同步区间首尾相接时走增量抓取，翻到 marker 就停，通常只要一页；
+  某天即将定稿的那次同步仍走全量，兜住排在 marker 之后补录的行
+- 全文索引：库里每一条（含关键词搜索抓到的，feed="search"）的 CVE / 名称 / 标签 / 描述
+  都进 FTS5 表 vulns_fts，search() 按 bm25 排序离线返回。
+  FTS5 默认分词不切中文，所以入库前自己分词：英文数字按词（查询时做前缀匹配），
+  连续汉字切成二元组；当前 SQLite 不带 FTS5 时退回 LIKE 扫描（不排序）
+"""
+
+from __future__ import annotations
+import datetime as dt
+import re, sqlite3, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from merge import merge_items
+from models import VulnItem
+from utils import (Marker, RangeFetcher, SinceFetcher, SOURCE_DEADLINE, _run_sources,
+                   bucket_by_date, date_range, merge_days)
+
+DB_FILE = Path.home() / ".vuln_crawler_cache" / "vulns.db"
+
+# 同步日期比该天晚 >= N 天才算定稿（上游常有当天晚些或隔天补录的条目）
+FINAL_AFTER_DAYS = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vulns (
+    feed        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    cve         TEXT,
+    date        TEXT NOT NULL,
+    severity    TEXT,
+    tags        TEXT,
+    source      TEXT NOT NULL,
+    description TEXT,
+    reference   TEXT,
+    PRIMARY KEY (feed, key)
+);
+CREATE INDEX IF NOT EXISTS vulns_feed_date ON vulns (feed, date);
+CREATE TABLE IF NOT EXISTS synced_days (
+    feed      TEXT NOT NULL,
+    day       TEXT NOT NULL,
+    synced_on TEXT NOT NULL,
+    PRIMARY KEY (feed, day)
+);
+CREATE TABLE IF NOT EXISTS markers (
+    feed TEXT PRIMARY KEY,
+    ts   TEXT NOT NULL,
+    id   TEXT NOT NULL
+);
+"""
+
+_COLS = "name, cve, date, severity, tags, source, description, reference"
+
+# FTS 表的 rowid 与 vulns 的 rowid 一一对应
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS vulns_fts USING fts5(cve, name, tags, body)"
+# bm25 各列权重：CVE > 名称 > 标签 > 描述
+_FTS_RANK = "bm25(vulns_fts, 10.0, 5.0, 2.0, 1.0)"
+
+# 关键词搜索抓到的条目存在这个 feed 下：只供全文检索，不参与按日期同步
+SEARCH_FEED = "search"
+
+_WORD = re.compile(r"[0-9a-z]+|[\u3400-\u9fff]+")
+
+def _fts_tokens(text: Optional[str]) -> List[str]:
+    """英文数字按词（小写），连续汉字切成二元组；单个汉字保留为一个词"""
+    out: List[str] = []
+    for w in _WORD.findall((text or "").lower()):
+        if w[0].isascii():
+            out.append(w)
+        elif len(w) == 1:
+            out.append(w)
+        else:
+            out.extend(w[i:i + 2] for i in range(len(w) - 1))
+    return out
+
+def _fts_row(it: VulnItem) -> Tuple[str, str, str, str]:
+    return (" ".join(_fts_tokens(it.cve)), " ".join(_fts_tokens(it.name)),
+            " ".join(_fts_tokens(it.tags)), " ".join(_fts_tokens(it.description)))
+
+def _fts_query(query: str) -> Optional[str]:
+    """把用户输入转成 FTS5 MATCH 表达式：各词 AND，英文词做前缀匹配；汉字只有一个时返回 None"""
+    terms = []
+    for w in _WORD.findall(query.lower()):
+        if w[0].isascii():
+            terms.append(f'"{w}"*')
+        elif len(w) == 1:
+            return None                  # 单字不在二元组里，交给 LIKE
+        else:
+            terms.extend(f'"{w[i:i + 2]}"' for i in range(len(w) - 1))
+    return " ".join(terms) or None
+
+
+def _row_key(it: VulnItem) -> str:
+    return f"{it.cve or it.name}@{it.date}"
+
+
+class VulnStore:
+    """线程安全：一个连接 + 一把锁，GUI 线程和抓取线程都可以直接调用"""
+
+    def __init__(self, path: Path = DB_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.execute(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:     # SQLite 编译时没带 FTS5
+                self.fts = False
+            if self.fts:
+                self._ensure_fts()
+
+    def _ensure_fts(self) -> None:
+        """旧库 / 索引缺行时整表重建一次（调用方持锁）"""
+        n_vulns, n_fts = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM vulns), (SELECT COUNT(*) FROM vulns_fts)").fetchone()
+        if n_vulns == n_fts:
+            return
+        self._conn.execute("DELETE FROM vulns_fts")
+        cur = self._conn.execute(f"SELECT rowid, {_COLS} FROM vulns")
+        self._conn.executemany(
+            "INSERT INTO vulns_fts (rowid, cve, name, tags, body) VALUES (?, ?, ?, ?, ?)",
+            ((row[0], *_fts_row(VulnItem(*row[1:]))) for row in cur.fetchall()))
+
+    def _upsert(self, feed: str, items: List[VulnItem], base: int) -> None:
+        """写入 / 覆盖条目并同步全文索引（调用方持锁、在事务里）"""
+        for i, it in enumerate(items):
+            key = _row_key(it)
+            if self.fts:
+                self._conn.execute(
+                    "DELETE FROM vulns_fts WHERE rowid IN "
+                    "(SELECT rowid FROM vulns WHERE feed = ? AND key = ?)", (feed, key))
+            cur = self._conn.execute(
+                f"INSERT OR REPLACE INTO vulns (feed, key, seq, {_COLS}) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (feed, key, base + i, it.name, it.cve, it.date, it.severity, it.tags,
+                 it.source, it.description, it.reference))
+            if self.fts:
+                self._conn.execute(
+                    "INSERT INTO vulns_fts (rowid, cve, name, tags, body) VALUES (?, ?, ?, ?, ?)",
+                    (cur.lastrowid, *_fts_row(it)))
+
+    # ---------------- 写入 ----------------
+
+    def save_span(self, feed: str, start: str, end: str,
+                  buckets: Dict[str, List[VulnItem]], merge: bool = False) -> None:
+        """
+        写入一次成功抓取的结果，并记下 [start, end] 这些天的同步日期
+          merge=False —— 整体替换该区间（全量抓取）
+          merge=True  —— 只追加 / 覆盖（增量抓取，结果里只有新条目），新条目排在同一天的前面
+        """
+        today = dt.date.today().isoformat()
+        items = [it for day in date_range(start, end) for it in buckets.get(day, [])]
+        with self._lock, self._conn:
+            base = 0
+            if merge:
+                row = self._conn.execute(
+                    "SELECT MIN(seq) FROM vulns WHERE feed = ?", (feed,)).fetchone()
+                base = (row[0] or 0) - len(items)
+            else:
+                if self.fts:
+                    self._conn.execute(
+                        "DELETE FROM vulns_fts WHERE rowid IN (SELECT rowid FROM vulns "
+                        "WHERE feed = ? AND date BETWEEN ? AND ?)", (feed, start, end))
+                self._conn.execute(
+                    "DELETE FROM vulns WHERE feed = ? AND date BETWEEN ? AND ?",
+                    (feed, start, end))
+            self._upsert(feed, items, base)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO synced_days (feed, day, synced_on) VALUES (?, ?, ?)",
+                [(feed, day, today) for day in date_range(start, end)])
+
+    def remember(self, items: List[VulnItem], feed: str = SEARCH_FEED) -> None:
+        """只追加 / 覆盖条目、不记同步日期（关键词搜索的结果，留给全文检索用）"""
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._upsert(feed, items, 0)
+
+    def set_marker(self, feed: str, marker: Optional[Marker]) -> None:
+        if not marker:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO markers (feed, ts, id) VALUES (?, ?, ?)",
+                (feed, marker[0], marker[1]))
+
+    # ---------------- 查询 ----------------
+
+    def items_between(self, feed: str, start: str, end: str) -> List[VulnItem]:
+        """按日期升序、同一天内保持抓取时的顺序"""
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT {_COLS} FROM vulns WHERE feed = ? AND date BETWEEN ? AND ? "
+                f"ORDER BY date, seq", (feed, start, end))
+            return [VulnItem(*row) for row in cur.fetchall()]
+
+    def search(self, query: str, limit: int = 500) -> List[VulnItem]:
+        """
+        离线全文检索（所有 feed）：CVE 完全一致的排最前，其余按 bm25 相关度；
+        同一漏洞在多个源 / 搜索结果里重复出现时合成一条，排在其最相关那条的位置
+        """
+        query = query.strip()
+        if not query:
+            return []
+        match = _fts_query(query) if self.fts else None
+        with self._lock:
+            if match:
+                cur = self._conn.execute(
+                    f"SELECT {', '.join('v.' + c.strip() for c in _COLS.split(','))} "
+                    f"FROM vulns_fts JOIN vulns v ON v.rowid = vulns_fts.rowid "
+                    f"WHERE vulns_fts MATCH ? "
+                    f"ORDER BY (upper(v.cve) = upper(?)) DESC, {_FTS_RANK} LIMIT ?",
+                    (match, query, limit * 2))
+            else:
+                like = f"%{query}%"
+                cur = self._conn.execute(
+                    f"SELECT {_COLS} FROM vulns WHERE name LIKE ? OR cve LIKE ? "
+                    f"OR tags LIKE ? OR description LIKE ? "
+                    f"ORDER BY (upper(cve) = upper(?)) DESC, date DESC LIMIT ?",
+                    (like, like, like, like, query, limit * 2))
+            rows = cur.fetchall()
+        return merge_items(VulnItem(*row) for row in rows)[:limit]
+
+    def high_water(self, feed: str) -> Optional[str]:
+        """该源已同步的最新日期；从未同步返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(day) FROM synced_days WHERE feed = ?", (feed,)).fetchone()
+        return row[0]
+
+    def get_marker(self, feed: str) -> Optional[Marker]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts, id FROM markers WHERE feed = ?", (feed,)).fetchone()
+        return tuple(row) if row else None
+
+    def covered(self, feed: str, start: str, end: str) -> bool:
+        """[start, end] 的每一天是否都同步过（不论是否定稿）"""
+        days = date_range(start, end)
+        if not days:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM synced_days WHERE feed = ? AND day BETWEEN ? AND ?",
+                (feed, start, end)).fetchone()
+        return row[0] == len(days)
+
+    def stale_span(self, feed: str, start: str, end: str) -> Optional[Tuple[str, str]]:
+        """[start, end] 内还需请求的最小连续区间；全部定稿返回 None"""
+        with self._lock:
+            synced = dict(self._conn.execute(
+                "SELECT day, synced_on FROM synced_days WHERE feed = ? AND day BETWEEN ? AND ?",
+                (feed, start, end)).fetchall())
+        stale = []
+        for day in date_range(start, end):
+            on = synced.get(day)
+            final_from = dt.date.fromisoformat(day) + dt.timedelta(days=FINAL_AFTER_DAYS)
+            if on is None or dt.date.fromisoformat(on) < final_from:
+                stale.append(day)
+        return (stale[0], stale[-1]) if stale else None
+
+
+_default: Optional[VulnStore] = None
+_default_lock = threading.Lock()
+
+def get_store() -> VulnStore:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = VulnStore()
+    return _default
+
+# ---------------- 增量同步 ----------------
+
+def _incremental_marker(store: VulnStore, feed: str, lo: str, hi: str) -> Optional[Marker]:
+    """
+    只有 [lo, 高水位] 每天都已同步过时 marker 才可信：
+    比 marker 旧、又落在待抓区间里的行一定已经在库里
+    """
+    # 这次同步会让 lo 定稿时走一次全量：排在 marker 之后才补录的行也能收进来
+    if dt.date.today() >= dt.date.fromisoformat(lo) + dt.timedelta(days=FINAL_AFTER_DAYS):
+        return None
+    hw = store.high_water(feed)
+    if hw is None:
+        return None
+    if hw < lo:
+        # 高水位紧挨着待抓区间才算首尾相接
+        if date_range(hw, lo)[1:] != [lo]:
+            return None
+    elif not store.covered(feed, lo, min(hi, hw)):
+        return None
+    return store.get_marker(feed)
+
+def sync_range(start: str, end: str, fetchers: List[RangeFetcher],
+               store: Optional[VulnStore] = None,
+               max_workers: int = 5,
+               deadline: Optional[float] = SOURCE_DEADLINE,
+               incremental: Optional[Dict[RangeFetcher, SinceFetcher]] = None,
+               ) -> Tuple[List[VulnItem], Dict[str, str]]:
+    """
+    与 utils.fetch_range 同样的返回值，但先查本地库：
+      - 每个源只请求还没定稿的那一段，成功后写回库
+      - incremental 把范围抓取函数映射到它的增量版本（fetch_xxx_since），
+        有可信 marker 时只抓比 marker 新的行
+      - 已定稿的源状态为 "cached"；请求失败的源照常报错，但库里已有的数据仍会返回
+      - 只有状态为 "ok" 的源才写库：失败 / 超时 / 熔断的源不动库里的行，也不推进 marker
+    """
+    store = store or get_store()
+    incremental = incremental or {}
+    plan, calls = [], []
+    for fn in fetchers:
+        feed = fn.__module__
+        span = store.stale_span(feed, start, end)
+        if not span:
+            continue
+        since = incremental.get(fn)
+        marker = _incremental_marker(store, feed, *span) if since else None
+        plan.append((fn, span, since, marker))
+        if since:
+            calls.append((fn.__name__, lambda since=since, span=span, marker=marker:
+                          since(span[0], span[1], marker)))
+        else:
+            calls.append((fn.__name__, lambda fn=fn, span=span: fn(*span)))
+
+    results, status = _run_sources(calls, max_workers, deadline)
+    for (fn, (lo, hi), since, marker), res in zip(plan, results):
+        if res is None or status.get(fn.__name__) != "ok":
+            continue
+        buckets, new_marker = res if since else (res, None)
+        mode = "since marker" if marker else "full"
+        print(f"[{fn.__name__}] {lo}..{hi} ({mode}): {sum(map(len, buckets.values()))} item(s)")
+        store.save_span(fn.__module__, lo, hi, buckets, merge=bool(marker))
+        store.set_marker(fn.__module__, new_marker)
+
+    return (cached_range(start, end, [fn.__module__ for fn in fetchers], store),
+            {fn.__name__: status.get(fn.__name__, "cached") for fn in fetchers})
+
+def cached_range(start: str, end: str, feeds: List[str],
+                 store: Optional[VulnStore] = None) -> List[VulnItem]:
+    """只读本地库、不发任何请求，按 sync_range 同样的方式逐日去重合并（GUI 启动时先出首屏用）"""
+    store = store or get_store()
+    per_source = [bucket_by_date(store.items_between(feed, start, end), start, end)
+                  for feed in feeds]
+    return merge_days(start, end, per_source)
@@ -0,0 +1,153 @@
+# tasks.py
+"""
+全应用共用的后台执行器
+
+- 按任务种类各一个有界线程池（POOL_SIZES），懒创建、进程内共享：
+    job    —— GUI 发起的编排任务（刷新、搜索的汇总线程、代理测试）
+    crawl  —— 刷新时每个数据源的抓取
+    search —— 关键词搜索时每个数据源的查询
+    poc    —— GitHub PoC 查询
+  编排任务只往别的池里提交，不会占着同一个池等自己的子任务，不会互相卡死
+- CancelToken 协作式取消：submit(token=...) 的任务在执行期间把它设为当前 token，
+  期间发起的 async_http.run_sync() 会在 token 取消时直接取消对应协程（在途请求随之中断），
+  还没开始执行的任务则直接跳过
+- 子任务默认继承提交者的当前 token；TaskSlot 保存“同一类只留最新一个”的 token，
+  renew() 时取消上一个（例如新搜索取消还在进行的旧搜索）
+"""
+
+from __future__ import annotations
+import threading, traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+POOL_SIZES: Dict[str, int] = {
+    "job":    4,
+    "crawl":  5,
+    "search": 5,
+    "poc":    4,
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+
+class Cancelled(Exception):
+    """任务所属的 CancelToken 已被取消"""
+
+
+class CancelToken:
+    """一次性的取消标记；子 token 会随父 token 一起取消"""
+
+    def __init__(self, parent: Optional["CancelToken"] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+        if parent is not None:
+            parent.add_callback(self.cancel)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception as e:
+                print("[tasks] cancel callback error:", e)
+
+    def add_callback(self, cb: Callable[[], Any]) -> None:
+        """取消时调用 cb；已取消则立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(cb)
+                return
+        cb()
+
+    def remove_callback(self, cb: Callable[[], Any]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(cb)
+            except ValueError:
+                pass
+
+    def child(self) -> "CancelToken":
+        return CancelToken(self)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise Cancelled()
+
+
+class TaskSlot:
+    """同一类任务只保留最新一个：renew() 取消上一个 token 并返回新的"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current: Optional[CancelToken] = None
+
+    def renew(self) -> CancelToken:
+        token = CancelToken()
+        with self._lock:
+            old, self.current = self.current, token
+        if old is not None:
+            old.cancel()
+        return token
+
+    def cancel(self) -> None:
+        with self._lock:
+            old, self.current = self.current, None
+        if old is not None:
+            old.cancel()
+
+
+def current_token() -> Optional[CancelToken]:
+    """当前线程正在执行的任务的 token（不在 submit 的任务里则为 None）"""
+    return getattr(_local, "token", None)
+
+def _pool(kind: str) -> ThreadPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            pool = _pools[kind] = ThreadPoolExecutor(
+                max_workers=POOL_SIZES[kind], thread_name_prefix=kind)
+        return pool
+
+def _run(token: Optional[CancelToken], fn: Callable, args, kwargs):
+    if token is not None:
+        token.raise_if_cancelled()       # 排队期间已取消：不再执行
+    prev, _local.token = current_token(), token
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.token = prev
+
+def submit(kind: str, fn: Callable, *args,
+           token: Optional[CancelToken] = None, **kwargs) -> Future:
+    """
+    把 fn(*args, **kwargs) 提交到 kind 对应的池，返回 Future
+    token 不传时继承当前任务的 token；任务开始前已取消则 Future 抛 Cancelled
+    """
+    if token is None:
+        token = current_token()
+    return _pool(kind).submit(_run, token, fn, args, kwargs)
+
+def _report(fut: Future) -> None:
+    if fut.cancelled():
+        return
+    exc = fut.exception()
+    if exc is not None and not isinstance(exc, Cancelled):
+        traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+def spawn(kind: str, fn: Callable, *args,
+          token: Optional[CancelToken] = None, **kwargs) -> Future:
+    """同 submit，用于没人等结果的后台任务：异常直接打印出来，不会被 Future 吞掉"""
+    fut = submit(kind, fn, *args, token=token, **kwargs)
+    fut.add_done_callback(_report)
+    return fut
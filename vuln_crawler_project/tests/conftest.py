@@ -0,0 +1,5 @@
+# conftest.py —— 项目是平铺模块（python main.py 直接跑），测试时把项目目录加进 sys.path
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
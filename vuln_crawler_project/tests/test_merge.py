@@ -0,0 +1,48 @@
+# test_merge.py
+from merge import merge_items
+from models import SOURCE_SEP, VulnItem
+
+
+def _item(name, cve=None, date="2025-01-02", source="奇安信 CERT", severity="高危", **kw):
+    return VulnItem(name=name, cve=cve, date=date, severity=severity, tags=kw.get("tags"),
+                    source=source, description=kw.get("description"), reference=None)
+
+
+def test_same_source_exact_duplicates_collapse():
+    a = _item("某 OA 系统任意文件上传漏洞")
+    b = _item("某 OA 系统任意文件上传漏洞", cve="")
+    merged = merge_items([a, b])
+    assert len(merged) == 1
+    assert merged[0].source == "奇安信 CERT"
+
+
+def test_same_cve_across_sources_merges_fields():
+    a = _item("Apache X 远程代码执行", cve="CVE-2025-0001", date="2025-01-03",
+              source="长亭 Rivers", severity="高危", tags="RCE")
+    b = _item("Apache X RCE", cve="cve-2025-0001", date="2025-01-02",
+              source="OSCS", severity="严重", tags="rce, 远程", description="longer text")
+    [m] = merge_items([a, b])
+    assert m.name == a.name and m.date == "2025-01-02" and m.severity == "严重"
+    assert m.source == SOURCE_SEP.join(["长亭 Rivers", "OSCS"])
+    assert m.description == "longer text"
+
+
+def test_different_cves_or_far_dates_stay_apart():
+    a = _item("Foo 组件 SQL 注入漏洞", cve="CVE-2025-1", source="长亭 Rivers")
+    b = _item("Foo 组件 SQL 注入漏洞", cve="CVE-2025-2", source="OSCS")
+    assert len(merge_items([a, b])) == 2
+    c = _item("Bar 插件反序列化漏洞", date="2025-01-01", source="长亭 Rivers")
+    d = _item("Bar 插件反序列化漏洞", date="2025-03-01", source="OSCS")
+    assert len(merge_items([c, d])) == 2
+
+
+def test_similar_titles_from_different_sources_merge():
+    a = _item("WordPress 某插件 任意文件上传漏洞", source="长亭 Rivers")
+    b = _item("WordPress某插件任意文件上传", source="OSCS")
+    assert len(merge_items([a, b])) == 1
+
+
+def test_empty_date_is_ignored_when_merging():
+    a = _item("Baz 权限绕过", cve="CVE-2025-9", date="", source="长亭 Rivers")
+    b = _item("Baz 权限绕过", cve="CVE-2025-9", date="2025-01-05", source="OSCS")
+    assert merge_items([a, b])[0].date == "2025-01-05"
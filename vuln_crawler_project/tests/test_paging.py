@@ -0,0 +1,40 @@
+# test_paging.py
+import asyncio
+
+import pytest
+
+from models import SearchBudget
+from paging import PageBudget, iter_pages
+
+
+def _fetcher(fail_page: int, pages: int = 10):
+    async def fetch(page: int):
+        if page == fail_page:
+            raise ConnectionError(f"page {page} down")
+        return {"page": page, "last": page >= pages}
+    return fetch
+
+
+async def _collect(fetch, budget=None):
+    return [p async for p, _ in iter_pages(fetch, is_last=lambda d: d["last"],
+                                             total=lambda d: 10, budget=budget)]
+
+
+def test_later_page_failure_keeps_earlier_pages_with_budget():
+    pb = PageBudget(SearchBudget(max_pages=None, max_results=None, time_limit=None))
+    assert asyncio.run(_collect(_fetcher(3), pb)) == [1, 2]
+    assert pb.truncated and "page 3 down" in pb.error
+
+
+def test_failure_propagates_without_budget_or_on_first_page():
+    with pytest.raises(ConnectionError):
+        asyncio.run(_collect(_fetcher(3)))
+    pb = PageBudget(SearchBudget())
+    with pytest.raises(ConnectionError):
+        asyncio.run(_collect(_fetcher(1), pb))
+
+
+def test_page_cap_marks_truncated():
+    pb = PageBudget(SearchBudget(max_pages=4, max_results=None, time_limit=None))
+    assert asyncio.run(_collect(_fetcher(0), pb)) == [1, 2, 3, 4]
+    assert pb.truncated and pb.error is None
@@ -0,0 +1,86 @@
+# test_resilience.py
+import asyncio, time
+
+import pytest
+
+import async_http
+import resilience
+
+
+class _Resp:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """替换 async_http.request：按 outcome 返回响应或抛异常，记录调用次数"""
+    state = {"calls": 0, "outcome": _Resp(200)}
+
+    async def fake(method, url, **kwargs):
+        state["calls"] += 1
+        out = state["outcome"]
+        if isinstance(out, BaseException):
+            raise out
+        return out
+
+    monkeypatch.setattr(async_http, "request", fake)
+    monkeypatch.setattr(resilience, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    return state
+
+
+def _call(source="src", method="GET"):
+    return asyncio.run(resilience.request(source, method, "http://example.invalid/"))
+
+
+def test_opens_after_threshold_and_skips_without_requests(transport):
+    transport["outcome"] = ConnectionError("down")
+    for _ in range(resilience.FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            _call()
+    calls = transport["calls"]
+    with pytest.raises(resilience.BreakerOpen):
+        _call()
+    assert transport["calls"] == calls
+    assert "src" in resilience.degraded()
+
+
+def test_only_idempotent_requests_are_retried(transport):
+    transport["outcome"] = _Resp(503)
+    with pytest.raises(resilience.RetryableStatus):
+        _call(method="POST")
+    assert transport["calls"] == 1
+    with pytest.raises(resilience.RetryableStatus):
+        _call(method="GET")
+    assert transport["calls"] == 1 + 1 + resilience.MAX_RETRIES
+
+
+def test_4xx_is_returned_without_retry(transport):
+    transport["outcome"] = _Resp(404)
+    assert _call().status_code == 404
+    assert transport["calls"] == 1
+
+
+def test_trial_cancelled_during_backoff_releases_half_open(transport, monkeypatch):
+    """半开试探在退避 sleep 中被取消，之后的请求仍要能再试探，而不是永远熔断"""
+    b = resilience.breaker("src")
+    b.open_until = time.monotonic() - 1          # 冷却已过：下一个请求是试探
+    transport["outcome"] = ConnectionError("down")
+    monkeypatch.setattr(resilience, "_backoff", lambda attempt: 10.0)
+
+    async def cancel_in_backoff():
+        task = asyncio.ensure_future(resilience.request("src", "GET", "http://example.invalid/"))
+        while transport["calls"] == 0:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)                 # 第一次失败后进入 10s 退避
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_in_backoff())
+    transport["outcome"] = _Resp(200)
+    assert _call().status_code == 200
+    assert resilience.degraded() == {}
+    assert b.open_until == 0.0
@@ -9,13 +9,18 @@ https://x.threatbook.com/v5/node/vul_module/homePage  (GET, JSON)
 功能
 ----
 - fetch_threatbook(date)   —— 按日期过滤 premium + highRisk 列表
-- search_threatbook(keyword) —— 关键词 / CVE 搜索
+- fetch_threatbook_range(start, end) —— 首页只拉一次，按日期分桶
+以上均有 async 版本（afetch_* / asearch_*），同步函数只是 run_sync() 包装
+- search_threatbook(keyword, budget) —— 关键词 / CVE 搜索（只有一个请求，预算只看条数和时间）
 """
 
-from typing import List, Optional
-import random, time
-from models import VulnItem
-from utils import _session
+from typing import Dict, List, Optional
+import asyncio
+import resilience
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult, VulnItem
+from utils import bucket_by_date
+from async_http import run_sync
+from paging import PageBudget
 
 API = "https://x.threatbook.com/v5/node/vul_module/homePage"
 
@@ -56,47 +61,52 @@ def _to_item(it: dict) -> Optional[VulnItem]:
         reference=None,
     )
 
-def _fetch_homepage(retry: int = 3) -> dict:
+async def _fetch_homepage() -> dict:
     """
-    GET homePage 接口，带简单退避重试；成功返回 .json()['data']
+    GET homePage 接口（重试与熔断见 resilience）；成功返回 .json()['data']
+    失败一律抛异常（熔断中为 BreakerOpen），不返回 {} 冒充“没有数据”
     """
-    for attempt in range(retry):
-        try:
-            r = _session.get(API, headers=_headers, timeout=8)
-            r.raise_for_status()
-            return r.json().get("data", {})
-        except Exception as e:
-            print(f"[ThreatBook] attempt {attempt+1}: {e}")
-            time.sleep(random.uniform(1, 2))
-    return {}
+    r = await resilience.request(__name__, "GET", API, headers=_headers, timeout=8)
+    r.raise_for_status()
+    return r.json().get("data", {})
 
 # ------------------------ 按日期抓取 ------------------------
 
-def fetch_threatbook(date: str) -> List[VulnItem]:
+async def afetch_threatbook_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
     """
-    返回 vuln_update_time 以 <date> 开头的 premium + highRisk 条目
+    返回 vuln_update_time 落在 [start, end] 的 premium + highRisk 条目，按日期分桶
     """
-    data = _fetch_homepage()
+    data = await _fetch_homepage()
     vulns: List[VulnItem] = []
 
     for key in ("premium", "highRisk"):
         for it in data.get(key, []):
             item = _to_item(it)
-            if item and item.date == date:
+            if item:
                 vulns.append(item)
 
-    return vulns
+    return bucket_by_date(vulns, start, end)
+
+async def afetch_threatbook(date: str) -> List[VulnItem]:
+    """
+    返回 vuln_update_time 以 <date> 开头的 premium + highRisk 条目
+    """
+    return (await afetch_threatbook_range(date, date))[date]
 
 # --------------------- 关键词 / CVE 搜索 ---------------------
 
-def search_threatbook(keyword: str) -> List[VulnItem]:
+async def asearch_threatbook(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
     """
     关键词搜索：
       - 以 'CVE-' 开头 → 精确匹配 id 字段
       - 否则 → 名称模糊匹配（大小写不敏感）
     搜索范围仅限 homePage 中的 premium + highRisk
     """
-    data = _fetch_homepage()
+    pb = PageBudget(budget or DEFAULT_BUDGET)
+    try:
+        data = await pb.wait(_fetch_homepage())
+    except asyncio.TimeoutError:
+        return SearchResult([], truncated=True)
     vulns: List[VulnItem] = []
 
     kw_lower = keyword.lower()
@@ -117,4 +127,17 @@ def search_threatbook(keyword: str) -> List[VulnItem]:
 
             vulns.append(item)
 
-    return vulns
+    if pb.max_results is not None and len(vulns) > pb.max_results:
+        return SearchResult(vulns[:pb.max_results], True)
+    return SearchResult(vulns)
+
+# ------------------------ 同步包装 ------------------------
+
+def fetch_threatbook_range(start: str, end: str) -> Dict[str, List[VulnItem]]:
+    return run_sync(afetch_threatbook_range(start, end))
+
+def fetch_threatbook(date: str) -> List[VulnItem]:
+    return run_sync(afetch_threatbook(date))
+
+def search_threatbook(keyword: str, budget: Optional[SearchBudget] = None) -> SearchResult:
+    return run_sync(asearch_threatbook(keyword, budget))
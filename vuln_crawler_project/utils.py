@@ -2,36 +2,167 @@
 公共工具：HTTP session、日期、去重合并
 """
 import datetime as _dt
-from typing import Dict, List, Callable, Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterable, List, Callable, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from models import VulnItem
+from merge import merge_items
+import resilience, tasks
 
 # ---------------- HTTP 会话 ----------------
+# 每个 host 保持的长连接数；async_http 的每 host 并发上限也取这个值
+POOL_PER_HOST = 8
+
 _session = requests.Session()
 _session.headers.update({
     "User-Agent": "Mozilla/5.0 vuln-crawler/1.1 (+https://example.com)",
     "Accept": "application/json, text/plain, */*",
-    "Connection": "close",
 })
 
+def _mount_adapters(per_host: int) -> None:
+    # 重试由各数据源自己做，这里不再叠加
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=per_host, max_retries=0)
+    _session.mount("http://", adapter)
+    _session.mount("https://", adapter)
+
+_mount_adapters(POOL_PER_HOST)
+
+def set_pool_size(per_host: int) -> None:
+    """运行时调整每 host 连接池大小（同步 session 与异步客户端一起生效）"""
+    global POOL_PER_HOST
+    POOL_PER_HOST = max(1, int(per_host))
+    _mount_adapters(POOL_PER_HOST)
+
+    import async_http                  # 延迟导入：async_http 依赖本模块
+    async_http.reset_client()
+
 # ---------------- 去重合并 ----------------
 Fetcher = Callable[[str], List[VulnItem]]
+RangeFetcher = Callable[[str, str], Dict[str, List[VulnItem]]]
+# 增量标记：分页源已入库的最新一行 (完整时间戳, 行 id)
+Marker = Tuple[str, str]
+SinceFetcher = Callable[[str, str, Optional[Marker]],
+                        Tuple[Dict[str, List[VulnItem]], Optional[Marker]]]
+
+def _dedupe(batches: Iterable[List[VulnItem]]) -> List[VulnItem]:
+    """跨源合并（按 CVE，再按标题相似度，见 merge.py），靠前的批次优先"""
+    return merge_items(it for items in batches for it in items)
+
+# 单个源的默认截止时间（秒），从该源真正开始执行时计时
+SOURCE_DEADLINE = 60.0
+
+def _run_sources(calls: List[Tuple[str, Callable[[], Any]]],
+                 max_workers: int, deadline: Optional[float]) -> Tuple[list, Dict[str, str]]:
+    """
+    在共用的 "crawl" 池里并发执行各源（同时最多 max_workers 个），calls 为 [(源名, 无参可调用)]
+    返回 (按 calls 顺序排列的结果, 各源状态)
+    状态: "ok" / "timeout" / "degraded: <msg>"（熔断中，未发请求）/ "error: <msg>"；
+    超时、熔断或出错的源结果为 None
+    每个源一个子 token（随调用方的 token 一起取消）；超时即取消该 token，
+    在途的异步请求随之中断，纯同步代码则只是不再等待、结果直接丢弃
+    """
+    results: list = [None] * len(calls)
+    status: Dict[str, str] = {}
+    started: Dict[int, float] = {}
+    parent = tasks.current_token()
+    tokens = [parent.child() if parent else tasks.CancelToken() for _ in calls]
+
+    def _call(i: int, fn: Callable):
+        started[i] = time.monotonic()
+        return fn()
+
+    queue = list(range(len(calls)))
+    pending: Dict[Any, int] = {}
+
+    def _top_up():
+        while queue and len(pending) < max_workers:
+            i = queue.pop(0)
+            pending[tasks.submit("crawl", _call, i, calls[i][1], token=tokens[i])] = i
 
-def fetch_all(target_date: str, fetchers: List[Fetcher]) -> List[VulnItem]:
-    seen: Dict[str, VulnItem] = {}
-    for fn in fetchers:
-        try:
-            items = fn(target_date)
-            print(f"[{fn.__name__}] {len(items)} item(s)")
-        except Exception as e:
-            print(f"[{fn.__name__}] ERROR → {e}")
+    try:
+        _top_up()
+        while pending:
+            timeout = None
+            if deadline is not None:
+                now = time.monotonic()
+                expired = [f for f, i in pending.items()
+                           if i in started and now - started[i] >= deadline]
+                for f in expired:
+                    i = pending.pop(f)
+                    tokens[i].cancel()
+                    status[calls[i][0]] = "timeout"
+                    print(f"[{calls[i][0]}] TIMEOUT after {deadline:.0f}s")
+                _top_up()
+                running = [started[i] + deadline - now for i in pending.values() if i in started]
+                # 还在排队的源没开始计时，稍后再看一次
+                timeout = min(running) if running else 0.05
+                if not pending:
+                    break
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for f in done:
+                i = pending.pop(f)
+                name = calls[i][0]
+                try:
+                    results[i] = f.result()
+                    status[name] = "ok"
+                except tasks.Cancelled:
+                    status[name] = "cancelled"
+                except resilience.BreakerOpen as e:
+                    print(f"[{name}] skipped → {e}")
+                    status[name] = f"degraded: {e}"
+                except Exception as e:
+                    print(f"[{name}] ERROR → {e}")
+                    status[name] = f"error: {e}"
+            _top_up()
+    finally:
+        for i in pending.values():
+            tokens[i].cancel()
+
+    return results, {name: status.get(name, "cancelled") for name, _ in calls}
+
+def fetch_all(target_date: str, fetchers: List[Fetcher],
+              max_workers: int = 5,
+              deadline: Optional[float] = SOURCE_DEADLINE) -> Tuple[List[VulnItem], Dict[str, str]]:
+    """
+    并发抓取单日数据；返回 (去重后的条目, {源函数名: 状态})
+    超时 / 出错的源不影响其它源，结果顺序与 fetchers 顺序一致
+    """
+    calls = [(fn.__name__, lambda fn=fn: fn(target_date)) for fn in fetchers]
+    results, status = _run_sources(calls, max_workers, deadline)
+    batches = []
+    for fn, items in zip(fetchers, results):
+        if items is None:
+            continue
+        print(f"[{fn.__name__}] {len(items)} item(s)")
+        batches.append(items)
+
+    return _dedupe(batches), status
+
+def fetch_range(start: str, end: str, fetchers: List[RangeFetcher],
+                max_workers: int = 5,
+                deadline: Optional[float] = SOURCE_DEADLINE) -> Tuple[List[VulnItem], Dict[str, str]]:
+    """
+    按日期范围抓取：每个源只调用一次 fn(start, end)，返回 {日期: [VulnItem]}
+    之后跨源合并（同一漏洞在不同源的不同日期也合成一条，日期取最早），按日期升序
+    各源并发执行，返回值同 fetch_all
+    """
+    calls = [(fn.__name__, lambda fn=fn: fn(start, end)) for fn in fetchers]
+    results, status = _run_sources(calls, max_workers, deadline)
+    per_source: List[Dict[str, List[VulnItem]]] = []
+    for fn, buckets in zip(fetchers, results):
+        if buckets is None:
             continue
+        print(f"[{fn.__name__}] {sum(map(len, buckets.values()))} item(s)")
+        per_source.append(buckets)
 
-        for it in items:
-            key = it.cve or f"{it.name}_{it.date}"
-            seen.setdefault(key, it)
+    return merge_days(start, end, per_source), status
 
-    return list(seen.values())
+def merge_days(start: str, end: str,
+               per_source: List[Dict[str, List[VulnItem]]]) -> List[VulnItem]:
+    """把各源的 {日期: [VulnItem]} 跨源合并，同一天里靠前的源优先，按日期升序返回"""
+    return _dedupe(b.get(day, []) for day in date_range(start, end) for b in per_source)
 
 # ---------------- 代理设置 ----------------
 def _normalize(url: Optional[str], default_scheme: str) -> Optional[str]:
@@ -70,6 +201,26 @@ def set_proxy(http_url: Optional[str] = None,
 
     _session.proxies = proxies
 
+    import async_http                  # 延迟导入：async_http 依赖本模块
+    async_http.reset_client()
+
 # ---------------- 小工具 ----------------
 def today() -> str:
     return _dt.date.today().isoformat()
+
+def date_range(start: str, end: str) -> List[str]:
+    """[start, end] 闭区间内的全部日期，格式 'YYYY-MM-DD'"""
+    cur, last = _dt.date.fromisoformat(start), _dt.date.fromisoformat(end)
+    days = []
+    while cur <= last:
+        days.append(cur.isoformat())
+        cur += _dt.timedelta(days=1)
+    return days
+
+def bucket_by_date(items: Iterable[VulnItem], start: str, end: str) -> Dict[str, List[VulnItem]]:
+    """把条目按 item.date 分桶；范围外的丢弃，范围内无数据的日期给空列表"""
+    buckets: Dict[str, List[VulnItem]] = {d: [] for d in date_range(start, end)}
+    for it in items:
+        if it.date in buckets:
+            buckets[it.date].append(it)
+    return buckets
@@ -0,0 +1,211 @@
+# vuln_crawler.py
+"""
+无界面命令行（不导入 Qt，服务器 / cron 可直接用）
+
+    python -m vuln_crawler fetch [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+    python -m vuln_crawler search <关键词或 CVE> [--local]
+    python -m vuln_crawler poc <CVE> [--name 漏洞名称]
+    python -m vuln_crawler daemon [--interval 分钟] [--days N]
+
+结果写到标准输出（默认 JSON Lines，--format csv 输出 CSV），一行一条；
+各模块的日志、源状态等一律写到标准错误，管道下游只会收到数据。
+fetch / daemon 与 GUI 一样先读本地库（store），--no-store 则每次都直接抓取。
+退出码：0 全部成功；1 有源失败 / 超时；2 参数错误。
+"""
+
+from __future__ import annotations
+import argparse, contextlib, csv, datetime as dt, json, os, sqlite3, sys, time
+from dataclasses import asdict, fields
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from models import SearchBudget, VulnItem
+from utils import fetch_range, today
+from store import sync_range
+from sources import FEEDS, INCREMENTAL_FETCHERS, RANGE_FETCHERS
+
+ITEM_FIELDS = [f.name for f in fields(VulnItem)]
+
+# ---------------- 输出 ----------------
+
+class _Writer:
+    """按 --format 把一行行 dict 写到 out，每行写完立即 flush（方便 tail / 管道）"""
+
+    def __init__(self, fmt: str, out: TextIO, fieldnames: List[str]):
+        self.out = out
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=fieldnames, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def row(self, d: dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(d)
+        else:
+            self.out.write(json.dumps(d, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+    def items(self, items: Iterable[VulnItem]) -> int:
+        n = 0
+        for it in items:
+            self.row(asdict(it))
+            n += 1
+        return n
+
+def _report(status: Dict[str, str]) -> bool:
+    """源状态写到 stderr；全部 ok / cached 返回 True"""
+    bad = {name: st for name, st in status.items() if st not in ("ok", "cached")}
+    for name, st in status.items():
+        print(f"  {name}: {st}", file=sys.stderr)
+    return not bad
+
+# ---------------- 子命令 ----------------
+
+def _fetchers(names: Optional[List[str]]):
+    if not names:
+        return RANGE_FETCHERS
+    return [fn for fn in RANGE_FETCHERS if fn.__module__ in names]
+
+def _crawl(start: str, end: str, names: Optional[List[str]], use_store: bool
+           ) -> Tuple[List[VulnItem], Dict[str, str]]:
+    fetchers = _fetchers(names)
+    if use_store:
+        try:
+            return sync_range(start, end, fetchers, incremental=INCREMENTAL_FETCHERS)
+        except sqlite3.Error as exc:
+            print("[store] unavailable, fetching directly:", exc)
+    return fetch_range(start, end, fetchers)
+
+def cmd_fetch(args, out: TextIO) -> int:
+    start, end = args.date_from or args.date_to, args.date_to
+    if start > end:
+        print("--from 不能晚于 --to", file=sys.stderr)
+        return 2
+    items, status = _crawl(start, end, args.sources, not args.no_store)
+    n = _Writer(args.format, out, ITEM_FIELDS).items(items)
+    print(f"[fetch] {start}..{end}: {n} item(s)", file=sys.stderr)
+    return 0 if _report(status) else 1
+
+def cmd_search(args, out: TextIO) -> int:
+    from vuln_search import SEARCHERS, iter_search, search_local
+    if args.local:
+        items = search_local(args.keyword, args.max_results or 500)
+        n = _Writer(args.format, out, ITEM_FIELDS).items(items)
+        print(f"[search] local index: {n} hit(s)", file=sys.stderr)
+        return 0
+    names = None
+    if args.sources:
+        names = [n for n, fn in SEARCHERS.items() if fn.__module__ in args.sources]
+    budget = SearchBudget(args.max_pages, args.max_results, args.time_limit)
+    writer = _Writer(args.format, out, ITEM_FIELDS)
+    seen, truncated = set(), False
+    # 哪个源先返回就先输出，跨源按 CVE / 名称_日期去重
+    for name, items in iter_search(args.keyword, names, budget=budget):
+        fresh = [it for it in items if it.key not in seen]
+        seen.update(it.key for it in fresh)
+        writer.items(fresh)
+        truncated |= items.truncated
+        print(f"[search] {name}: {len(items)} hit(s), {len(fresh)} new", file=sys.stderr)
+    if truncated:
+        print("[search] 部分源已按预算截断", file=sys.stderr)
+    return 0
+
+def cmd_poc(args, out: TextIO) -> int:
+    from poc_fetcher import fetch_poc_urls, set_github_token
+    from config_io import load_cfg
+    token = os.environ.get("GITHUB_TOKEN") or load_cfg().get("github_token")
+    if token:
+        set_github_token(token)
+    urls = fetch_poc_urls(args.cve, args.name, args.cve)
+    if urls is None:
+        print(f"[poc] GitHub 查询失败: {args.cve}", file=sys.stderr)
+        return 1
+    writer = _Writer(args.format, out, ["cve", "url"])
+    for url in urls:
+        writer.row({"cve": args.cve, "url": url})
+    return 0
+
+def cmd_daemon(args, out: TextIO) -> int:
+    """定时抓取最近 --days 天，每轮只输出之前没输出过的条目"""
+    writer = _Writer(args.format, out, ITEM_FIELDS)
+    seen = set()
+    try:
+        while True:
+            end = today()
+            start = (dt.date.fromisoformat(end) - dt.timedelta(days=args.days)).isoformat()
+            items, status = _crawl(start, end, args.sources, not args.no_store)
+            fresh = [it for it in items if it.key not in seen]
+            seen.update(it.key for it in fresh)
+            writer.items(fresh)
+            print(f"[daemon] {start}..{end}: {len(items)} item(s), {len(fresh)} new", file=sys.stderr)
+            _report(status)
+            time.sleep(args.interval * 60)
+    except KeyboardInterrupt:
+        return 0
+
+# ---------------- 参数 ----------------
+
+def _date(s: str) -> str:
+    try:
+        return dt.date.fromisoformat(s).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {s}")
+
+def _names(s: str) -> List[str]:
+    names = [n.strip() for n in s.split(",") if n.strip()]
+    unknown = set(names) - set(FEEDS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"未知数据源: {', '.join(sorted(unknown))}（可选: {', '.join(FEEDS)}）")
+    return names
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m vuln_crawler",
+                                description="高价值漏洞采集（命令行版）")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--format", choices=("jsonl", "csv"), default="jsonl",
+                        help="输出格式（默认 jsonl）")
+    common.add_argument("--sources", type=_names, default=None,
+                        help=f"只用这些源，逗号分隔（{','.join(FEEDS)}）")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    f = sub.add_parser("fetch", parents=[common], help="按日期范围抓取")
+    f.add_argument("--from", dest="date_from", type=_date, default=None,
+                   help="起始日期（默认与 --to 相同）")
+    f.add_argument("--to", dest="date_to", type=_date, default=today(),
+                   help="结束日期（默认今天）")
+    f.add_argument("--no-store", action="store_true", help="不读写本地库，直接抓取")
+    f.set_defaults(func=cmd_fetch)
+
+    s = sub.add_parser("search", parents=[common], help="关键词 / CVE 搜索")
+    s.add_argument("keyword")
+    s.add_argument("--local", action="store_true",
+                   help="只查本地库的全文索引（离线，按相关度排序）")
+    default = SearchBudget()
+    s.add_argument("--max-pages", type=int, default=default.max_pages)
+    s.add_argument("--max-results", type=int, default=default.max_results)
+    s.add_argument("--time-limit", type=float, default=default.time_limit,
+                   help="每个源最多花多少秒")
+    s.set_defaults(func=cmd_search)
+
+    c = sub.add_parser("poc", parents=[common], help="在 GitHub 上查 PoC / EXP")
+    c.add_argument("cve")
+    c.add_argument("--name", default=None, help="漏洞名称，补充关键词")
+    c.set_defaults(func=cmd_poc)
+
+    d = sub.add_parser("daemon", parents=[common], help="定时抓取，持续输出新条目")
+    d.add_argument("--interval", type=float, default=30, help="间隔分钟数（默认 30）")
+    d.add_argument("--days", type=int, default=2, help="每轮回看的天数（默认 2，与 GUI 一致）")
+    d.add_argument("--no-store", action="store_true", help="不读写本地库，直接抓取")
+    d.set_defaults(func=cmd_daemon)
+    return p
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    # 各模块的 print 日志改到 stderr，stdout 只留数据
+    with contextlib.redirect_stdout(sys.stderr):
+        return args.func(args, out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
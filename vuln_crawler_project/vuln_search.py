@@ -4,12 +4,21 @@
 ---------------------------------
 依赖各数据源的 search_xxx(keyword) 函数，而不是 fetch_xxx(date)。
 这样就不会再把空日期传给日期接口，避免 isoformat 解析报错。
+iter_search() 按源完成的先后逐批产出结果，search_vulns() 收齐后一次返回。
+每个源各自受 SearchBudget（页数 / 条数 / 时间）约束，任一源提前返回时结果 truncated=True。
+联网搜到的条目顺手存进本地库，search_local() 在本地全文索引里离线检索（不联网）。
+SEARCH_CACHE 按 (规范化关键词, 源, 预算) 缓存每个源的结果（LRU + TTL），
+同一个键的并发请求只发一次（single-flight），重复 / 并发的相同搜索只花一轮上游请求。
 """
 
-import threading
-from typing import List, Optional
-from models import VulnItem
+import sqlite3, threading, time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+from models import DEFAULT_BUDGET, SearchBudget, SearchResult
+from store import get_store
 import changtin, oscs, qianxin, threatbook, cisa
+import tasks
 
 # 仅放“搜索入口” ↓↓↓
 SEARCHERS = {
@@ -20,49 +29,209 @@ SEARCHERS = {
     "CISA":      cisa.search_cisa,
 }
 
-def search_vulns(
+# ---------------- 结果缓存 ----------------
+
+CacheKey = Tuple[str, str, SearchBudget]
+
+
+def _cache_key(keyword: str, source: str, budget: Optional[SearchBudget]) -> CacheKey:
+    """关键词去首尾空白、合并连续空白、忽略大小写（各源本来就不区分大小写）"""
+    return " ".join(keyword.split()).lower(), source, budget or DEFAULT_BUDGET
+
+
+class _Flight:
+    """某个键正在进行的一次上游请求；waiters 为 0 时取消"""
+
+    def __init__(self, token: tasks.CancelToken):
+        self.token = token
+        self.future: Optional[Future] = None
+        self.waiters = 1
+
+
+class SearchCache:
+    """
+    单个源搜索结果的 LRU + TTL 缓存，外加 single-flight：
+    - get(key)        —— 未过期的结果（副本），没有返回 None
+    - join(key, run)  —— 同键已有在途请求就跟上去，否则用 run(token) 发起一个；
+                         在途请求有自己的 token，不随某个调用方取消
+    - leave(flight)   —— 调用方不再等了；最后一个离开时才真正取消请求
+    只缓存正常完成的结果：出错 / 取消的不缓存（各源 search_* 请求失败时抛异常，
+    不会返回空结果冒充“没有命中”）；翻页中途出错的部分结果（带 error）、
+    时间预算用完一条都没拿到的截断结果也不缓存
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, SearchResult]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def get(self, key: Hashable) -> Optional[SearchResult]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, items = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return SearchResult(items, truncated=items.truncated)
+
+    def join(self, key: Hashable, run: Callable[[tasks.CancelToken], Future]) -> _Flight:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                return flight
+            flight = self._flights[key] = _Flight(tasks.CancelToken())
+            flight.future = run(flight.token)
+        flight.future.add_done_callback(lambda f: self._finish(key, flight))
+        return flight
+
+    def leave(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters > 0 or flight.future.done():
+                return
+            if self._flights.get(key) is flight:
+                del self._flights[key]      # 之后的同键请求重新发起，不接这个要取消的
+        flight.token.cancel()
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        f = flight.future
+        ok = not f.cancelled() and f.exception() is None
+        if ok:
+            items = f.result()
+            ok = items.error is None and (bool(items) or not items.truncated)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not ok:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, f.result())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+SEARCH_CACHE = SearchCache()
+
+# ---------------- 搜索 ----------------
+
+def _search_and_remember(fn, keyword: str, budget: Optional[SearchBudget]) -> SearchResult:
+    items = fn(keyword, budget)
+    try:
+        get_store().remember(list(items))
+    except sqlite3.Error as e:
+        print("[store] remember search results failed:", e)
+    return items
+
+def iter_search(
     keyword: str,
     sources: Optional[List[str]] = None,
     max_workers: int = 5,
-) -> List[VulnItem]:
+    budget: Optional[SearchBudget] = None,
+) -> Iterator[Tuple[str, SearchResult]]:
     """
-    根据 CVE 或漏洞名称搜索漏洞（不限制日期）
-    ------------------------------------------------
-    * CVE：忽略大小写 **精确匹配**（keyword 以 'CVE-' 开头）
-    * 名称：忽略大小写 **模糊包含**
-    * 若 sources 为 None → 查询 SEARCHERS 全部源
+    流式搜索：各源在共用的 "search" 池里并发执行（同时最多 max_workers 个），
+    哪个源先完成就先 yield (源名, 该源结果)
+    出错的源 yield 空结果，保证每个源都恰好出现一次
+    命中 SEARCH_CACHE 的源直接产出；同样的源 + 关键词已在别处搜索中时跟着等同一个请求。
+    当前任务的 token 被取消时迭代直接结束；调用方中途停止迭代时放弃其余源——
+    没有其他调用方在等的请求随即取消（在途请求中断）
     """
     if sources is None:
         sources = SEARCHERS.keys()
 
-    results: List[VulnItem] = []
-    mutex = threading.Lock()
-    threads = []
-
-    def _task(name: str, fn):
-        try:
-            items = fn(keyword)             # 各源的搜索函数
-            with mutex:
-                results.extend(items)
-        except Exception as e:
-            print(f"Error searching {name}: {e}")
-
+    calls = []
     for name in sources:
         fn = SEARCHERS.get(name)
         if not fn:
             print(f"[WARN] 未找到搜索函数: {name}")
             continue
-        t = threading.Thread(target=_task, args=(name, fn), daemon=True)
-        threads.append(t)
-        t.start()
+        calls.append((name, fn))
+    if not calls:
+        return
+
+    parent = tasks.current_token()
+    stop: Future = Future()            # 调用方取消时置位，把 wait() 叫醒
+    on_cancel = lambda: stop.done() or stop.set_result(None)
+    if parent is not None:
+        parent.add_callback(on_cancel)
+    pending: Dict[Future, Tuple[str, CacheKey, _Flight]] = {}
 
-        # 控制并发数，避免瞬间开太多线程
-        while len([th for th in threads if th.is_alive()]) >= max_workers:
-            for th in threads:
-                th.join(timeout=0.1)
+    def _top_up():
+        while calls and len(pending) < max_workers:
+            name, fn = calls.pop(0)
+            key = _cache_key(keyword, name, budget)
+            flight = SEARCH_CACHE.join(key, lambda token, fn=fn: tasks.submit(
+                "search", _search_and_remember, fn, keyword, budget, token=token))
+            pending[flight.future] = (name, key, flight)
 
-    # 等待剩余线程
-    for t in threads:
-        t.join()
+    try:
+        for name, fn in list(calls):
+            items = SEARCH_CACHE.get(_cache_key(keyword, name, budget))
+            if items is not None:
+                calls.remove((name, fn))
+                print(f"[{name}] search served from cache")
+                yield name, items
+        _top_up()
+        while pending:
+            done, _ = wait([stop, *pending], return_when=FIRST_COMPLETED)
+            if stop.done():
+                return
+            for f in done:
+                name, key, flight = pending.pop(f)
+                SEARCH_CACHE.leave(key, flight)
+                try:
+                    items = f.result()      # 各源的搜索函数
+                except Exception as e:
+                    print(f"Error searching {name}: {e!r}")
+                    items = SearchResult()
+                if items.error:
+                    print(f"[{name}] search stopped early, partial result: {items.error}")
+                elif items.truncated:
+                    print(f"[{name}] search truncated by budget")
+                yield name, SearchResult(items, truncated=items.truncated, error=items.error)
+            _top_up()
+    finally:
+        if parent is not None:
+            parent.remove_callback(on_cancel)
+        for name, key, flight in pending.values():
+            SEARCH_CACHE.leave(key, flight)
 
+def search_vulns(
+    keyword: str,
+    sources: Optional[List[str]] = None,
+    max_workers: int = 5,
+    budget: Optional[SearchBudget] = None,
+) -> SearchResult:
+    """
+    根据 CVE 或漏洞名称搜索漏洞（不限制日期）
+    ------------------------------------------------
+    * CVE：忽略大小写 **精确匹配**（keyword 以 'CVE-' 开头）
+    * 名称：忽略大小写 **模糊包含**
+    * 若 sources 为 None → 查询 SEARCHERS 全部源
+    * budget 为 None → 各源使用 models.DEFAULT_BUDGET
+    * 结果经 SEARCH_CACHE 缓存，TTL 内再搜同样的关键词不会再请求上游
+    等全部源完成后一次性返回；想边搜边展示请用 iter_search()
+    """
+    results = SearchResult()
+    for _, items in iter_search(keyword, sources, max_workers, budget):
+        results.extend(items)
+        results.truncated = results.truncated or items.truncated
     return results
+
+def search_local(keyword: str, limit: int = 500) -> SearchResult:
+    """
+    只查本地库的全文索引（刷新抓过的 + 以前联网搜到过的全部条目），不发请求
+    名称 / 描述 / 标签 / CVE 都参与匹配，结果按相关度排序；达到 limit 条时 truncated=True
+    """
+    items = get_store().search(keyword, limit)
+    return SearchResult(items, truncated=len(items) >= limit)
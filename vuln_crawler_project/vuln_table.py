@@ -0,0 +1,275 @@
+# vuln_table.py
+"""
+结果表格的 Model
+
+- VulnTableModel —— QAbstractTableModel 直接包住 VulnItem 列表，视图只向它要可见行的数据，
+  几万行也不会创建任何单元格对象；排序在 Python 里按列 key 一次 sorted() 完成，
+  筛选按 FilterIndex 一次算出可见列表，都比 QSortFilterProxyModel 逐对调用
+  lessThan / 逐行调用 filterAcceptsRow 快得多，所以视图直接挂这个模型，不套 Proxy
+- FilterIndex / RowFilter —— 本地筛选：入表时预先算好小写名称、大写 CVE，
+  来源 / 等级各建一个倒排表；每次按键只在内存里扫一遍，不发任何请求。
+  新条件只是在上一次条件上收窄（多打一个字）时，只在上次的结果里找
+- ItemRole 取回整条 VulnItem（详情面板用）
+- PoC 列：按 CVE 记录已查到的 PoC 数（后台预取 / 点击查询的结果），
+  set_poc() 只刷新该 CVE 所在的单元格
+"""
+
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+
+from models import SEV_RANK, VulnItem
+
+COLUMNS = ["名称", "日期", "来源", "等级", "PoC"]
+POC_COLUMN = 4
+
+SEV_COLOR = {
+    "严重": QColor("#c678dd"),  # 紫
+    "极危": QColor("#e06c75"),  # 红
+    "高危": QColor("#e5a742"),  # 橘
+    "高风险": QColor("#61afef"),  # 蓝（ThreatBook）
+    "中危": QColor("#d19a66"),  # 黄
+}
+
+ItemRole = Qt.ItemDataRole.UserRole
+
+_CELLS: List[Callable[[VulnItem], str]] = [
+    lambda v: v.name,
+    lambda v: v.date,
+    lambda v: v.source,
+    lambda v: v.severity or "",
+]
+_SORT_KEYS: List[Callable[[VulnItem], object]] = [
+    attrgetter("name"),
+    attrgetter("date"),
+    attrgetter("source"),
+    lambda v: SEV_RANK.get(v.severity, 0),
+]
+
+def _poc_cell(n: Optional[int]) -> str:
+    """None = 还没查；0 = 没找到"""
+    if n is None:
+        return ""
+    return f"✔ {n}" if n else "—"
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """本地筛选条件；空字符串表示该项不限"""
+    source: str = ""
+    severity: str = ""
+    date: str = ""        # 日期前缀：2025 / 2025-01 / 2025-01-05
+    cve: str = ""         # CVE 前缀，不区分大小写
+    name: str = ""        # 名称子串，不区分大小写
+
+    def normalized(self) -> "RowFilter":
+        return RowFilter(self.source, self.severity, self.date.strip(),
+                         self.cve.strip().upper(), self.name.strip().lower())
+
+    def is_empty(self) -> bool:
+        return not (self.source or self.severity or self.date or self.cve or self.name)
+
+    def refines(self, other: "RowFilter") -> bool:
+        """self 的结果一定是 other 结果的子集（other 的每一项都被 self 包含或收窄）"""
+        return ((not other.source or other.source == self.source)
+                and (not other.severity or other.severity == self.severity)
+                and self.date.startswith(other.date)
+                and self.cve.startswith(other.cve)
+                and other.name in self.name)
+
+
+class FilterIndex:
+    """表格条目的筛选索引（按入表顺序编号，与表格当前排序无关）"""
+
+    def __init__(self):
+        self.version = 0
+        self._ids: List[int] = []
+        self._names: List[str] = []
+        self._cves: List[str] = []
+        self._dates: List[str] = []
+        self.by_source: Dict[str, Set[int]] = defaultdict(set)
+        self.by_severity: Dict[str, Set[int]] = defaultdict(set)
+        self._last: Optional[Tuple[int, RowFilter, List[int]]] = None
+
+    def reset(self, items: Iterable[VulnItem]) -> None:
+        version = self.version            # 版本号只增不减，select() 靠它判断上次的结果还能不能复用
+        self.__init__()
+        self.version = version
+        self.extend(items)
+
+    def extend(self, items: Iterable[VulnItem]) -> None:
+        for it in items:
+            pos = len(self._ids)
+            self._ids.append(id(it))
+            self._names.append(it.name.lower())
+            self._cves.append((it.cve or "").upper())
+            self._dates.append(it.date or "")
+            for src in it.sources:          # 合并条目按其中每个源都能筛到
+                self.by_source[src].add(pos)
+            if it.severity:
+                self.by_severity[it.severity].add(pos)
+        self.version += 1
+
+    def select(self, f: RowFilter) -> Optional[Set[int]]:
+        """返回满足条件的条目 id() 集合；条件为空返回 None（全部显示）"""
+        f = f.normalized()
+        if f.is_empty():
+            return None
+        last = self._last
+        if last and last[0] == self.version and f.refines(last[1]):
+            candidates = last[2]
+        else:
+            candidates = range(len(self._ids))
+        if f.source:
+            pool = self.by_source.get(f.source, set())
+            candidates = [p for p in candidates if p in pool]
+        if f.severity:
+            pool = self.by_severity.get(f.severity, set())
+            candidates = [p for p in candidates if p in pool]
+        if f.date:
+            dates = self._dates
+            candidates = [p for p in candidates if dates[p].startswith(f.date)]
+        if f.cve:
+            cves = self._cves
+            candidates = [p for p in candidates if cves[p].startswith(f.cve)]
+        if f.name:
+            names = self._names
+            candidates = [p for p in candidates if f.name in names[p]]
+        hits = list(candidates)
+        self._last = (self.version, f, hits)
+        return {self._ids[p] for p in hits}
+
+
+class VulnTableModel(QAbstractTableModel):
+    """
+    all_items 是全部条目（按当前排序），rows 是其中通过筛选、实际显示的部分；
+    筛选一次性在 Python 里算出可见列表，而不是让 Proxy 对每一行回调 filterAcceptsRow
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._all: List[VulnItem] = []
+        self._rows: List[VulnItem] = []
+        self.filter_index = FilterIndex()
+        self._filter = RowFilter()
+        self._accepted: Optional[Set[int]] = None
+        self._sort_col = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._poc: Dict[str, int] = {}          # CVE → PoC 数，跨刷新保留
+
+    @property
+    def all_items(self) -> List[VulnItem]:
+        """全部条目（按当前排序，不受筛选影响）；只读，修改请用 set_items / append_items"""
+        return self._all
+
+    @property
+    def rows(self) -> List[VulnItem]:
+        """当前显示的条目（按当前排序）；只读"""
+        return self._rows
+
+    # ---------------- Qt 接口 ----------------
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        v = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == POC_COLUMN:
+                return _poc_cell(self.poc_count(v))
+            return _CELLS[index.column()](v)
+        if role == Qt.ItemDataRole.ForegroundRole and index.column() == 3:
+            return SEV_COLOR.get(v.severity)
+        if role == ItemRole:
+            return v
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        self._sort_col, self._sort_order = column, order
+        if column < 0 or not self._all:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        if column == POC_COLUMN:
+            key = lambda v: -1 if self.poc_count(v) is None else self.poc_count(v)
+        else:
+            key = _SORT_KEYS[column]
+        self._all.sort(key=key, reverse=order == Qt.SortOrder.DescendingOrder)
+        self._rows = self._visible(self._all)
+        new_pos = {id(v): i for i, v in enumerate(self._rows)}
+        old_idx = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_idx, [self.index(new_pos[id(old_rows[i.row()])], i.column()) for i in old_idx])
+        self.layoutChanged.emit()
+
+    # ---------------- 数据更新 ----------------
+
+    def _visible(self, items: List[VulnItem]) -> List[VulnItem]:
+        acc = self._accepted
+        return list(items) if acc is None else [v for v in items if id(v) in acc]
+
+    def set_items(self, items: Iterable[VulnItem]) -> None:
+        self.beginResetModel()
+        self._all = list(items)
+        self.filter_index.reset(self._all)
+        self._accepted = self.filter_index.select(self._filter)
+        self._rows = self._visible(self._all)
+        self.endResetModel()
+        self.sort(self._sort_col, self._sort_order)
+
+    def append_items(self, items: List[VulnItem]) -> None:
+        """追加一批（流式搜索用），按当前筛选 / 排序放好"""
+        if not items:
+            return
+        self._all.extend(items)
+        self.filter_index.extend(items)
+        self._accepted = self.filter_index.select(self._filter)
+        shown = self._visible(items)
+        if shown:
+            n = len(self._rows)
+            self.beginInsertRows(QModelIndex(), n, n + len(shown) - 1)
+            self._rows.extend(shown)
+            self.endInsertRows()
+        self.sort(self._sort_col, self._sort_order)
+
+    def set_filter(self, f: RowFilter) -> None:
+        self.beginResetModel()
+        self._filter = f
+        self._accepted = self.filter_index.select(f)
+        self._rows = self._visible(self._all)
+        self.endResetModel()
+
+    def item(self, row: int) -> Optional[VulnItem]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    # ---------------- PoC 列 ----------------
+
+    def poc_count(self, v: VulnItem) -> Optional[int]:
+        return self._poc.get(v.cve.upper()) if v.cve else None
+
+    def set_poc(self, cve: str, n: int) -> None:
+        cve = cve.upper()
+        if self._poc.get(cve) == n:
+            return
+        self._poc[cve] = n
+        for row, v in enumerate(self._rows):
+            if v.cve and v.cve.upper() == cve:
+                idx = self.index(row, POC_COLUMN)
+                self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DisplayRole])
+